@@ -0,0 +1,65 @@
+"""Outstanding balances of unpaid invoices, cached between requests"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from djmoney.money import Money
+
+SCHOOL_BALANCES_CACHE_KEY = "lessons:school_balances"
+
+
+def _user_balance_cache_key(user_id):
+    return f"lessons:balance:{user_id}"
+
+
+def outstanding_balance(user):
+    """Returns a dict with the total price and the count of the user's unpaid
+    invoices, summed up in the database"""
+    from .models import Invoice
+
+    key = _user_balance_cache_key(user.pk)
+    balance = cache.get(key)
+    if balance is None:
+        totals = Invoice.objects.filter(user=user, is_paid=False).aggregate(
+            total=Sum("price"), count=Count("id")
+        )
+        balance = {
+            "total": Money(totals["total"] or 0, "GBP"),
+            "count": totals["count"],
+        }
+        cache.set(key, balance, settings.BALANCE_CACHE_TIMEOUT)
+    return balance
+
+
+def school_balances():
+    """Returns a list of dicts with the school name, the total price and the
+    count of the unpaid invoices of every school's students"""
+    from .models import Invoice
+
+    balances = cache.get(SCHOOL_BALANCES_CACHE_KEY)
+    if balances is None:
+        balances = [
+            {
+                "school_name": row["user__student__school_name"],
+                "total": Money(row["total"], "GBP"),
+                "count": row["count"],
+            }
+            for row in Invoice.objects.filter(is_paid=False)
+            .values("user__student__school_name")
+            .annotate(total=Sum("price"), count=Count("id"))
+            .order_by("user__student__school_name")
+        ]
+        cache.set(SCHOOL_BALANCES_CACHE_KEY, balances, settings.BALANCE_CACHE_TIMEOUT)
+    return balances
+
+
+def invalidate_balances(user_ids):
+    """Drops the cached balances of the given users and of every school
+
+    Invoice signals call this for single saves, anything that writes invoices
+    with update() or bulk_create() has to call it itself. Inside a transaction
+    the balances are dropped once it commits, so a request in between cannot
+    cache the old totals again."""
+    cache_keys = [_user_balance_cache_key(user_id) for user_id in user_ids]
+    cache_keys.append(SCHOOL_BALANCES_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
@@ -0,0 +1,31 @@
+"""ETags for conditional GETs of the list and detail pages"""
+from functools import wraps
+import hashlib
+
+
+def per_request(func):
+    """Keeps the result of func(request, ...) on the request
+
+    The ETag and Last-Modified functions of a view and the view itself can
+    then share one lookup."""
+    attr = f"_{func.__name__}_result"
+
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, attr):
+            setattr(request, attr, func(request, *args, **kwargs))
+        return getattr(request, attr)
+
+    return wrapper
+
+
+def page_etag(request, *parts):
+    """Returns an ETag for a page from the user, the full path and parts
+    describing the rows shown
+
+    The user is part of it because the pages differ between students and
+    admins, and the path because it holds the filters and the page number."""
+    key = "|".join(
+        str(part) for part in (request.user.pk, request.get_full_path(), *parts)
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
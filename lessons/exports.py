@@ -0,0 +1,82 @@
+"""CSV exports of the bookings, lessons and invoices, streamed row by row"""
+import csv
+
+from django.conf import settings
+
+BOOKING_COLUMNS = [
+    ("booking_id", "id"),
+    ("student_email", "user__email"),
+    ("student_first_name", "user__first_name"),
+    ("student_last_name", "user__last_name"),
+    ("teacher_email", "teacher__user__email"),
+    ("num_of_lessons", "num_of_lessons"),
+    ("days_between_lessons", "days_between_lessons"),
+    ("lesson_duration", "lesson_duration"),
+    ("description", "description"),
+    ("invoice_urn", "invoice__urn"),
+    ("price", "invoice__price"),
+    ("currency", "invoice__price_currency"),
+    ("is_paid", "invoice__is_paid"),
+]
+
+LESSON_COLUMNS = [
+    ("lesson_id", "id"),
+    ("booking_id", "booking"),
+    ("date", "date"),
+    ("start_time", "startTime"),
+    ("duration", "booking__lesson_duration"),
+    ("student_email", "booking__user__email"),
+    ("student_first_name", "booking__user__first_name"),
+    ("student_last_name", "booking__user__last_name"),
+    ("teacher_email", "booking__teacher__user__email"),
+    ("invoice_urn", "booking__invoice__urn"),
+    ("is_paid", "booking__invoice__is_paid"),
+    ("edited", "edited"),
+]
+
+INVOICE_COLUMNS = [
+    ("invoice_urn", "urn"),
+    ("student_email", "user__email"),
+    ("student_first_name", "user__first_name"),
+    ("student_last_name", "user__last_name"),
+    ("price", "price"),
+    ("currency", "price_currency"),
+    ("is_paid", "is_paid"),
+]
+
+
+# spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def escape_cell(value):
+    """Prefixes text that a spreadsheet would read as a formula with a quote
+
+    Names and descriptions are typed in by users, so a first name such as
+    =HYPERLINK(...) must not run when an admin opens the export."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class Echo:
+    """File-like object that hands back what is written to it, so csv.writer
+    can format single rows for a streaming response"""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(queryset, columns, chunk_size=None):
+    """Yields the header and then every row of queryset as CSV lines
+
+    The rows are fetched as plain tuples chunk_size at a time with
+    iterator(), using a server-side cursor where the database has one, so
+    memory use does not grow with the size of the table."""
+    if chunk_size is None:
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+    rows = queryset.order_by("pk").values_list(*[field for _, field in columns])
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow([escape_cell(value) for value in row])
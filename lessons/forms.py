@@ -3,6 +3,7 @@ from django import forms
 from django.core.validators import RegexValidator
 from django.contrib.auth.forms import UserCreationForm
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from .models import (
     Lesson,
     Booking,
@@ -14,6 +15,7 @@ from .models import (
     User,
     SchoolAdmin,
 )
+from .scheduling import ALL_WEEKDAYS, TeacherTimetable, to_minutes
 from django.contrib.auth import authenticate
 
 
@@ -250,7 +252,9 @@ class LogInForm(forms.Form):
 
 class SchoolTermForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
-        self._instance = kwargs.pop("instance", None)
+        # the instance is also passed on, so that validating an edited term
+        # knows which term is being edited
+        self._instance = kwargs.get("instance", None)
         super().__init__(*args, **kwargs)
 
         # this if statement is executed if the user is using the form to
@@ -389,6 +393,7 @@ class EditBookingForm(forms.ModelForm):
             "description": forms.Textarea(),
         }
 
+    @transaction.atomic
     def save(self):
         super().save(commit=False)
         self._booking.num_of_lessons = self.cleaned_data.get("num_of_lessons")
@@ -424,12 +429,31 @@ class EditLessonForm(forms.ModelForm):
             "description": forms.Textarea(),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        date = cleaned_data.get("date")
+        start_time = cleaned_data.get("startTime")
+        if self._lesson and date and start_time:
+            # the teacher must not already have another lesson at that time
+            booking = self._lesson.booking
+            timetable = TeacherTimetable.load(
+                [booking.teacher_id], date, date, exclude_lesson=self._lesson.pk
+            )
+            if timetable.conflicts(
+                booking.teacher_id, date, to_minutes(start_time), booking.lesson_duration
+            ):
+                raise forms.ValidationError(
+                    "The teacher already has a lesson at this time"
+                )
+        return cleaned_data
+
     def save(self):
         super().save(commit=False)
         self._lesson.name = self.cleaned_data.get("name")
         self._lesson.date = self.cleaned_data.get("date")
         self._lesson.startTime = self.cleaned_data.get("startTime")
         self._lesson.description = self.cleaned_data.get("description")
+        self._lesson.edited = True
         self._lesson.save()
 
         return self._lesson
@@ -439,12 +463,15 @@ class PaymentForm(forms.Form):
     def __init__(self, *args, **kwargs):
         self._user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
-        if self._user:
-            invoices = self._user.invoice_set.filter(is_paid=False)
-            self.fields["invoice_urn"].queryset = invoices
 
-    invoice_urn = forms.ModelChoiceField(
-        label="Invoice reference number", queryset=Invoice.objects.all()
+    # the user's unpaid invoices are suggested by the invoice_search endpoint
+    # as they type, rather than listed up front in a select
+    invoice_urn = forms.CharField(
+        label="Invoice reference number",
+        max_length=50,
+        widget=forms.TextInput(
+            attrs={"list": "invoice-urns", "autocomplete": "off"}
+        ),
     )
     account_name = forms.CharField(max_length=50)
     account_number = forms.CharField(
@@ -476,10 +503,14 @@ class PaymentForm(forms.Form):
         ],
     )
 
-    def clean_invoice(self):
-        invoice_urn = self.cleaned_data.get("invoice_urn")
-        if not Invoice.objects.filter(urn=invoice_urn).exists():
+    def clean_invoice_urn(self):
+        invoice_urn = self.cleaned_data.get("invoice_urn").strip()
+        # a single lookup on the unique urn index
+        if not Invoice.objects.filter(
+            urn=invoice_urn, user=self._user, is_paid=False
+        ).exists():
             raise forms.ValidationError("Enter valid invoice urn")
+        return invoice_urn
 
 
 class ForgotPasswordForm(forms.Form):
@@ -589,14 +620,109 @@ class FulfillLessonRequestForm(forms.ModelForm):
             description=self.cleaned_data.get("description"),
             user=self._lesson_request.user,
             teacher=self.cleaned_data.get("teacher"),
+            weekday_mask=self._lesson_request.weekday_mask or ALL_WEEKDAYS,
         )
-        try:
-            booking.create_lessons()
-        except AttributeError:
-            raise Exception("No School Term in DB")
+        booking.create_lessons()
 
         # booking created, mark request as fulfilled
         self._lesson_request.fulfilled = True
         self._lesson_request.save()
 
         return booking
+
+
+class BulkFulfillRequestsForm(forms.Form):
+    """Lets an admin pick a teacher for many requests for lessons at once"""
+
+    def __init__(self, *args, **kwargs):
+        self._lesson_requests = kwargs.pop("lesson_requests")
+        teachers = kwargs.pop("teachers")
+        # optional dict of request id to a suggested teacher id
+        proposal = kwargs.pop("proposal", {})
+        super().__init__(*args, **kwargs)
+
+        # the teacher choices are built once and shared by every request
+        teacher_choices = [("", "---------")] + [
+            (teacher.pk, str(teacher)) for teacher in teachers
+        ]
+        for lesson_request in self._lesson_requests:
+            self.fields[f"teacher_{lesson_request.id}"] = forms.TypedChoiceField(
+                label=(
+                    f"{lesson_request.user.first_name} {lesson_request.user.last_name}: "
+                    f"{lesson_request.no_of_lessons} lessons of "
+                    f"{lesson_request.lesson_duration} minutes"
+                ),
+                choices=teacher_choices,
+                coerce=int,
+                empty_value=None,
+                required=False,
+                initial=proposal.get(lesson_request.id),
+            )
+
+    def assignments(self):
+        """Returns a dict of request id to the id of the teacher picked for it"""
+        assignments = {}
+        for lesson_request in self._lesson_requests:
+            teacher_id = self.cleaned_data.get(f"teacher_{lesson_request.id}")
+            if teacher_id is not None:
+                assignments[lesson_request.id] = teacher_id
+        return assignments
+
+
+class BookingFilterForm(forms.Form):
+    """Narrows down the bookings list, every field is optional"""
+
+    def __init__(self, *args, **kwargs):
+        self._user = kwargs.pop("user")
+        super().__init__(*args, **kwargs)
+        if not self._user.is_school_admin:
+            # everyone else only sees their own bookings anyway
+            del self.fields["student"]
+            del self.fields["teacher"]
+
+    student = forms.EmailField(label="Student's email", required=False)
+    teacher = forms.ModelChoiceField(
+        queryset=Teacher.objects.select_related("user").order_by("user__email"),
+        required=False,
+    )
+    unpaid = forms.BooleanField(label="Only unpaid bookings", required=False)
+    lessons_from = forms.DateField(
+        label="With lessons from",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    lessons_to = forms.DateField(
+        label="With lessons until",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        lessons_from = cleaned_data.get("lessons_from")
+        lessons_to = cleaned_data.get("lessons_to")
+        if lessons_from and lessons_to and lessons_from > lessons_to:
+            self.add_error("lessons_to", "The end of the range is before its start")
+        return cleaned_data
+
+    def filter(self, bookings):
+        """Applies the filters to a queryset of bookings"""
+        student = self.cleaned_data.get("student")
+        if student:
+            bookings = bookings.filter(user__email=student)
+        teacher = self.cleaned_data.get("teacher")
+        if teacher:
+            bookings = bookings.filter(teacher=teacher)
+        if self.cleaned_data.get("unpaid"):
+            bookings = bookings.filter(invoice__is_paid=False)
+
+        lessons_from = self.cleaned_data.get("lessons_from")
+        lessons_to = self.cleaned_data.get("lessons_to")
+        if lessons_from or lessons_to:
+            lessons = Lesson.objects.filter(booking=OuterRef("pk"))
+            if lessons_from:
+                lessons = lessons.filter(date__gte=lessons_from)
+            if lessons_to:
+                lessons = lessons.filter(date__lte=lessons_to)
+            bookings = bookings.filter(Exists(lessons))
+        return bookings
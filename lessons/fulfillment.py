@@ -0,0 +1,198 @@
+"""Fulfilling many requests for lessons at once"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+from django.utils import timezone
+
+from .balances import invalidate_balances
+from .models import (
+    Booking,
+    Invoice,
+    InvoiceSequence,
+    Lesson,
+    RequestForLessons,
+    Student,
+    Teacher,
+)
+from .row_cache import invalidate_rows
+from .scheduling import ALL_WEEKDAYS, TeacherTimetable, get_term_index
+
+# extra weekly minutes it costs to give a student a teacher from another school
+OTHER_SCHOOL_PENALTY = 120
+
+
+@transaction.atomic
+def fulfill_requests(assignments, batch_size=None):
+    """Fulfills every request in assignments, a dict of request id to teacher id
+
+    All bookings, invoices and lessons are written with batched inserts in a
+    single transaction. A request that cannot be fulfilled does not stop the
+    others, it is reported instead.
+
+    Returns a pair of the created bookings and a dict of request id to the
+    reason that request could not be fulfilled."""
+    if batch_size is None:
+        batch_size = settings.LESSON_BULK_CREATE_BATCH_SIZE
+
+    failures = {}
+    lesson_requests = (
+        RequestForLessons.objects.select_for_update()
+        .select_related("user")
+        .in_bulk(list(assignments))
+    )
+    teachers = Teacher.objects.select_related("user").in_bulk(
+        set(assignments.values())
+    )
+
+    bookings = []
+    for request_id, teacher_id in assignments.items():
+        lesson_request = lesson_requests.get(request_id)
+        if lesson_request is None:
+            failures[request_id] = "Request for lessons does not exist"
+        elif lesson_request.fulfilled:
+            failures[request_id] = "Request has already been fulfilled"
+        elif teacher_id not in teachers:
+            failures[request_id] = "Teacher does not exist"
+        else:
+            booking = Booking(
+                num_of_lessons=lesson_request.no_of_lessons,
+                days_between_lessons=lesson_request.days_between_lessons,
+                lesson_duration=lesson_request.lesson_duration,
+                weekday_mask=lesson_request.weekday_mask or ALL_WEEKDAYS,
+                user=lesson_request.user,
+                teacher=teachers[teacher_id],
+            )
+            booking.lesson_request = lesson_request
+            bookings.append(booking)
+
+    # work out every schedule before writing anything, sharing one term index
+    # and one timetable so the batch cannot double-book a teacher
+    term_index = get_term_index()
+    try:
+        schedules = list(zip(bookings, Booking.lesson_schedules(bookings, term_index)))
+    except ValidationError:
+        # some booking does not fit, schedule them one by one to find out which
+        schedules = []
+        for booking in bookings:
+            try:
+                schedules.append((booking, booking.lesson_schedule(term_index)))
+            except ValidationError as error:
+                failures[booking.lesson_request.id] = " ".join(error.messages)
+    all_dates = [date for _, dates in schedules for date in dates]
+    if all_dates:
+        timetable = TeacherTimetable.load(
+            {booking.teacher_id for booking, _ in schedules},
+            min(all_dates),
+            max(all_dates),
+        )
+    else:
+        timetable = TeacherTimetable()
+
+    bookings = []
+    lessons = []
+    for booking, dates in schedules:
+        try:
+            planned = booking.planned_lessons(timetable=timetable, dates=dates)
+        except ValidationError as error:
+            failures[booking.lesson_request.id] = " ".join(error.messages)
+        else:
+            bookings.append(booking)
+            lessons.extend(planned)
+
+    # reserve a block of invoice numbers for each user in one go
+    invoice_counts = Counter(booking.user_id for booking in bookings)
+    invoice_nums = InvoiceSequence.reserve(invoice_counts) if invoice_counts else {}
+    invoices = []
+    for booking in bookings:
+        invoice = Invoice(
+            user=booking.user,
+            invoice_num=invoice_nums[booking.user_id],
+            price=booking.calculate_price(),
+        )
+        invoice_nums[booking.user_id] += 1
+        invoice.set_urn()
+        invoices.append(invoice)
+    Invoice.objects.bulk_create(invoices, batch_size=batch_size)
+
+    for booking, invoice in zip(bookings, invoices):
+        booking.invoice = invoice
+    Booking.objects.bulk_create(bookings, batch_size=batch_size)
+    Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+
+    request_ids = [booking.lesson_request.id for booking in bookings]
+    RequestForLessons.objects.filter(id__in=request_ids).update(
+        fulfilled=True, updated_at=timezone.now()
+    )
+
+    # none of the batched writes above send signals
+    invalidate_balances(invoice_counts)
+    invalidate_rows("request", request_ids)
+    invalidate_rows("invoice", [invoice.urn for invoice in invoices])
+    invalidate_rows("booking", [booking.pk for booking in bookings])
+    invalidate_rows("lesson", [lesson.pk for lesson in lessons])
+
+    return bookings, failures
+
+
+def teacher_loads():
+    """Returns a dict of teacher id to the minutes of lessons per week they
+    already teach, worked out in the database from their bookings"""
+    weekly_minutes = ExpressionWrapper(
+        F("lesson_duration") * 7.0 / F("days_between_lessons"),
+        output_field=FloatField(),
+    )
+    return dict(
+        Booking.objects.values_list("teacher")
+        .annotate(load=Sum(weekly_minutes))
+        .order_by()
+    )
+
+
+def propose_assignments(lesson_requests=None, teachers=None):
+    """Proposes a teacher for every request, keeping the teachers' weekly
+    loads balanced
+
+    Giving a request to a teacher costs the teacher's weekly load after
+    taking it on, plus OTHER_SCHOOL_PENALTY if the student goes to another
+    school. Requests are handed out largest first, each to the cheapest
+    teacher at that point, which is O(requests * teachers) and so stays fast
+    for thousands of requests.
+
+    Returns a dict of request id to the proposed teacher id."""
+    if lesson_requests is None:
+        lesson_requests = RequestForLessons.objects.filter(fulfilled=False)
+    if teachers is None:
+        teachers = Teacher.objects.all()
+    lesson_requests = list(lesson_requests)
+    teachers = list(teachers)
+    if not teachers:
+        return {}
+
+    loads = teacher_loads()
+    loads = {teacher.pk: loads.get(teacher.pk, 0) for teacher in teachers}
+    school_names = dict(
+        Student.objects.filter(
+            user__in={lesson_request.user_id for lesson_request in lesson_requests}
+        ).values_list("user", "school_name")
+    )
+
+    def weekly_minutes(lesson_request):
+        return lesson_request.lesson_duration * 7 / lesson_request.days_between_lessons
+
+    proposal = {}
+    for lesson_request in sorted(lesson_requests, key=weekly_minutes, reverse=True):
+        minutes = weekly_minutes(lesson_request)
+        school_name = school_names.get(lesson_request.user_id)
+        best_teacher, best_cost = None, None
+        for teacher in teachers:
+            cost = loads[teacher.pk] + minutes
+            if teacher.school_name != school_name:
+                cost += OTHER_SCHOOL_PENALTY
+            if best_cost is None or cost < best_cost:
+                best_teacher, best_cost = teacher, cost
+        loads[best_teacher.pk] += minutes
+        proposal[lesson_request.id] = best_teacher.pk
+    return proposal
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from lessons.fulfillment import fulfill_requests, propose_assignments
+
+
+class Command(BaseCommand):
+    help = "Fulfills many requests for lessons at once in a single transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "assignments",
+            nargs="*",
+            metavar="REQUEST_ID:TEACHER_ID",
+            help="a request for lessons and the teacher to book it with",
+        )
+        parser.add_argument(
+            "--auto",
+            action="store_true",
+            help="fulfill every unfulfilled request with the proposed teachers",
+        )
+
+    def handle(self, *args, **options):
+        if options["auto"]:
+            assignments = propose_assignments()
+        elif options["assignments"]:
+            assignments = {}
+        else:
+            raise CommandError("Give some assignments or use --auto")
+        for assignment in options["assignments"]:
+            try:
+                request_id, teacher_id = assignment.split(":")
+                assignments[int(request_id)] = int(teacher_id)
+            except ValueError:
+                raise CommandError(
+                    f"'{assignment}' should be a request id and a teacher id, e.g. 12:3"
+                )
+
+        bookings, failures = fulfill_requests(assignments)
+
+        self.stdout.write(f"Fulfilled {len(bookings)} requests")
+        for request_id, reason in sorted(failures.items()):
+            self.stdout.write(f"     >Request {request_id} not fulfilled: {reason}")
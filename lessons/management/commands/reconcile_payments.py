@@ -0,0 +1,131 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from lessons.balances import invalidate_balances
+from lessons.models import Invoice
+from lessons.row_cache import invalidate_rows
+
+# a reference number is the student number and the invoice number, e.g. 1002-3,
+# the lookarounds keep dates such as 2022-12-01 from matching
+URN_PATTERN = re.compile(r"(?<![\d-])(\d{4,}-\d+)(?![\d-])")
+
+
+class Command(BaseCommand):
+    help = (
+        "Marks invoices paid from a bank statement CSV and reports the lines "
+        "that could not be matched to an unpaid invoice"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("statement", help="path of the bank statement CSV")
+        parser.add_argument(
+            "--report",
+            help="write the mismatch report to this file instead of the output",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="number of statement lines matched and paid at a time",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            statement = open(options["statement"], newline="")
+        except OSError as error:
+            raise CommandError(f"Could not open the statement: {error}")
+        report_file = None
+        if options["report"]:
+            report_file = open(options["report"], "w", newline="")
+
+        with statement:
+            report = csv.writer(report_file or self.stdout, lineterminator="\n")
+            report.writerow(["line", "urn", "reason"])
+            paid, mismatched = self._reconcile(
+                csv.reader(statement), report, options["chunk_size"]
+            )
+        if report_file:
+            report_file.close()
+
+        self.stdout.write(
+            f"Marked {paid} invoices paid, {mismatched} lines did not match"
+        )
+
+    def _reconcile(self, rows, report, chunk_size):
+        """Matches the statement chunk by chunk so only one chunk of lines and
+        their invoices are ever held in memory"""
+        rows = enumerate(rows, start=1)
+        amount_column = None
+        paid = mismatched = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return paid, mismatched
+            if amount_column is None:
+                amount_column = self._amount_column(chunk[0][1])
+
+            payments = {}
+            for line, row in chunk:
+                match = URN_PATTERN.search(",".join(row))
+                if match is None:
+                    # the first line without a reference number is the header
+                    if line != 1:
+                        report.writerow([line, "", "no reference number"])
+                        mismatched += 1
+                    continue
+                urn = match.group(1)
+                if urn in payments:
+                    report.writerow([line, urn, "paid more than once in statement"])
+                    mismatched += 1
+                    continue
+                payments[urn] = (line, self._amount(row, amount_column))
+
+            # one indexed lookup for the whole chunk, keyed by reference number
+            invoices = {
+                urn: (invoice_id, user_id, price)
+                for urn, invoice_id, user_id, price in Invoice.objects.filter(
+                    urn__in=list(payments), is_paid=False
+                ).values_list("urn", "id", "user", "price")
+            }
+            to_pay = []
+            paid_urns = []
+            user_ids = set()
+            for urn, (line, amount) in payments.items():
+                if urn not in invoices:
+                    reason = "no unpaid invoice with this reference"
+                    report.writerow([line, urn, reason])
+                    mismatched += 1
+                    continue
+                invoice_id, user_id, price = invoices[urn]
+                if amount is not None and amount != price:
+                    reason = f"amount {amount} does not match {price}"
+                    report.writerow([line, urn, reason])
+                    mismatched += 1
+                    continue
+                to_pay.append(invoice_id)
+                paid_urns.append(urn)
+                user_ids.add(user_id)
+            # is_paid=False keeps this safe against payments made in the meantime
+            paid += Invoice.objects.filter(id__in=to_pay, is_paid=False).update(
+                is_paid=True, updated_at=timezone.now()
+            )
+            invalidate_balances(user_ids)
+            invalidate_rows("invoice", paid_urns)
+
+    def _amount_column(self, header):
+        """Returns the index of the amount column if the statement has a header
+        naming one, or -1"""
+        names = [name.strip().lower() for name in header]
+        return names.index("amount") if "amount" in names else -1
+
+    def _amount(self, row, amount_column):
+        if amount_column < 0 or amount_column >= len(row):
+            return None
+        try:
+            return Decimal(row[amount_column].strip().lstrip("£"))
+        except InvalidOperation:
+            return None
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from lessons.models import Invoice
+
+
+class Command(BaseCommand):
+    help = "Reprices every unpaid invoice from its booking at the current tariff"
+
+    def handle(self, *args, **options):
+        repriced = Invoice.objects.reprice()
+        self.stdout.write(
+            f"Repriced {repriced} unpaid invoices at "
+            f"£{settings.LESSON_TARIFF_PER_MINUTE} a minute"
+        )
@@ -3,6 +3,7 @@ import random
 from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
 from django.db import IntegrityError
+from django.utils import timezone
 from faker import Faker
 from lessons.models import (
     Booking, 
@@ -13,6 +14,8 @@ from lessons.models import (
     User,
     Teacher,
 )
+from lessons.fulfillment import fulfill_requests
+from lessons.row_cache import invalidate_rows
 
 
 class Command(BaseCommand):
@@ -108,6 +111,8 @@ class Command(BaseCommand):
         # create 3 unfulfilled and 3 fulfilled requests
         # for every regular user in the DB
         reg_users = User.objects.filter(is_school_admin=False).filter(is_admin=False)
+        teachers = list(Teacher.objects.all())
+        assignments = {}
         for u in reg_users:
             for _ in range(3):
                 WEEKDAYS = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
@@ -136,26 +141,29 @@ class Command(BaseCommand):
                 days_between_lessons = random.randrange(2, 14)
                 lesson_duration = random.choice((15, 30, 60))
                 other_info = self.faker.sentence()
-                RequestForLessons.objects.create(
+                lesson_request = RequestForLessons.objects.create(
                     user=u,
-                    fulfilled=True,
+                    fulfilled=False,
                     availability=availability,
                     no_of_lessons=no_of_lessons,
                     days_between_lessons=days_between_lessons,
                     lesson_duration=lesson_duration,
                     other_info=other_info,
                 )
-                booking = Booking.objects.create(
-                    num_of_lessons=no_of_lessons,
-                    user=u,
-                    teacher=random.choice(Teacher.objects.all()),
-                    description=f'A description about the music lesson',
-                    days_between_lessons=days_between_lessons,
-                    lesson_duration=lesson_duration,
-                )
-                booking.save()
-                booking.create_lessons()
+                assignments[lesson_request.id] = random.choice(teachers).pk
                 print(".", end="", flush=True)
+        print("")
+
+        # fulfil them all at once, their schedules are worked out together
+        bookings, failures = fulfill_requests(assignments)
+        booking_ids = [booking.pk for booking in bookings]
+        Booking.objects.filter(pk__in=booking_ids).update(
+            description="A description about the music lesson",
+            updated_at=timezone.now(),
+        )
+        invalidate_rows("booking", booking_ids)
+        for request_id, reason in failures.items():
+            print(f"     >Could not fulfil request {request_id}: {reason}")
 
     def _seed_students(self):
         for i in range(101):
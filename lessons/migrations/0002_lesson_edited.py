@@ -0,0 +1,18 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='edited',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0002_lesson_edited'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='weekday_mask',
+            field=models.PositiveSmallIntegerField(default=127, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(127)]),
+        ),
+    ]
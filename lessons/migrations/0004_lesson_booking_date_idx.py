@@ -0,0 +1,17 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0003_booking_weekday_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['booking', 'date', 'startTime'], name='lesson_booking_date_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+def add_overlap_constraint(apps, schema_editor):
+    # only PostgreSQL can enforce non-overlapping terms in the database,
+    # other backends rely on SchoolTerm.clean()
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE lessons_schoolterm ADD CONSTRAINT school_terms_do_not_overlap "
+        "EXCLUDE USING gist (daterange(start_date, end_date, '[]') WITH &&)"
+    )
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE lessons_schoolterm DROP CONSTRAINT school_terms_do_not_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0004_lesson_booking_date_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='schoolterm',
+            name='_editing',
+        ),
+        migrations.AddIndex(
+            model_name='schoolterm',
+            index=models.Index(fields=['start_date', 'end_date'], name='school_term_dates_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='schoolterm',
+            constraint=models.CheckConstraint(check=models.Q(('start_date__lte', models.F('end_date'))), name='school_term_start_before_end'),
+        ),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_invoice_sequences(apps, schema_editor):
+    # start every user's sequence at their last invoice number
+    Invoice = apps.get_model("lessons", "Invoice")
+    InvoiceSequence = apps.get_model("lessons", "InvoiceSequence")
+    last_invoice_nums = (
+        Invoice.objects.values_list("user")
+        .annotate(models.Max("invoice_num"))
+        .order_by()
+    )
+    InvoiceSequence.objects.bulk_create(
+        InvoiceSequence(user_id=user_id, last_invoice_num=last_invoice_num)
+        for user_id, last_invoice_num in last_invoice_nums
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0005_school_term_overlap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_invoice_num', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_invoice_sequences, migrations.RunPython.noop),
+    ]
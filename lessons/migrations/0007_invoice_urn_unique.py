@@ -0,0 +1,18 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0006_invoice_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='urn',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
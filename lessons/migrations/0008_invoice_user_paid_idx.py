@@ -0,0 +1,17 @@
+# Generated by Django 4.1.2 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0007_invoice_urn_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['user', 'is_paid'], name='invoice_user_paid_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.2 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0008_invoice_user_paid_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestforlessons',
+            index=models.Index(fields=['fulfilled', '-request_created_at'], name='request_fulfilled_created_idx'),
+        ),
+    ]
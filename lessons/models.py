@@ -1,11 +1,28 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Round
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from djmoney.models.fields import MoneyField
 from djmoney.money import Money
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.utils import timezone
 import datetime
-import random
+from decimal import ROUND_HALF_UP, Decimal
+
+from .balances import invalidate_balances
+from .row_cache import invalidate_rows
+from .scheduling import (
+    ALL_WEEKDAYS,
+    FIRST_LESSON_START,
+    TeacherTimetable,
+    availability_to_mask,
+    batch_lesson_dates,
+    from_minutes,
+    get_term_index,
+    lesson_dates,
+    to_minutes,
+)
 
 
 # Create your models here.
@@ -133,32 +150,142 @@ class SchoolAdmin(models.Model):
         return self.user.email
 
 
+def lesson_tariff():
+    """Returns the price of a minute of lessons in pounds"""
+    return Decimal(str(settings.LESSON_TARIFF_PER_MINUTE))
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def mark_paid(self, urn, user):
+        """Marks the user's invoice with the given reference number as paid
+
+        This is a single conditional UPDATE on the unique urn, so paying an
+        invoice twice is a cheap no-op. Returns True if the invoice went from
+        unpaid to paid."""
+        paid = bool(
+            self.filter(urn=urn, user=user, is_paid=False).update(
+                is_paid=True, updated_at=timezone.now()
+            )
+        )
+        if paid:
+            invalidate_balances([user.pk])
+            invalidate_rows("invoice", [urn])
+        return paid
+
+    def reprice(self):
+        """Sets the price of every unpaid invoice in the queryset from its
+        booking at the current tariff
+
+        The new prices are worked out in the database and written with one
+        UPDATE, only touching invoices whose price changes. Returns the number
+        of repriced invoices."""
+        new_price = models.Subquery(
+            Booking.objects.filter(invoice=models.OuterRef("pk"))
+            .annotate(new_price=Booking.price_expression())
+            .values("new_price")[:1]
+        )
+        repriced = (
+            self.filter(is_paid=False, booking__isnull=False)
+            .annotate(new_price=new_price)
+            .exclude(price=models.F("new_price"))
+        )
+        affected = list(repriced.values_list("user", "urn"))
+        if not affected:
+            return 0
+        count = Invoice.objects.filter(pk__in=repriced.values("pk")).update(
+            price=new_price, updated_at=timezone.now()
+        )
+        invalidate_balances({user_id for user_id, _ in affected})
+        invalidate_rows("invoice", [urn for _, urn in affected])
+        return count
+
+
 class Invoice(models.Model):
     """Defines an invoice with the given user, its unique reference number and price"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=False)
     student_num = models.IntegerField(blank=False)
     invoice_num = models.IntegerField(blank=False)
-    urn = models.CharField(max_length=50)
+    urn = models.CharField(max_length=50, unique=True)
     price = MoneyField(decimal_places=2, max_digits=5, default_currency="GBP")
     is_paid = models.BooleanField(default=False)
+    # update() does not touch auto_now fields, so it has to set this itself
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        """creates the unique reference number of the invoice by adding the student number and invoice number"""
-        self.student_num = self.user.pk + 1000
-        self.urn = str(self.student_num) + "-" + str(self.invoice_num)
-        super(Invoice, self).save(*args, **kwargs)
+    objects = InvoiceQuerySet.as_manager()
 
     class Meta:
         unique_together = (
             "student_num",
             "invoice_num",
         )
+        indexes = [
+            models.Index(fields=["user", "is_paid"], name="invoice_user_paid_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.set_urn()
+        super(Invoice, self).save(*args, **kwargs)
+
+    def set_urn(self):
+        """creates the unique reference number of the invoice by adding the student number and invoice number"""
+        self.student_num = self.user_id + 1000
+        self.urn = str(self.student_num) + "-" + str(self.invoice_num)
 
     def __str__(self):
         """This allows the invoice to be defined by its unique reference number"""
         return self.urn
 
 
+class InvoiceSequence(models.Model):
+    """Keeps the number of the last invoice of every user, so new invoice numbers
+    can be handed out without counting the user's invoices"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    last_invoice_num = models.IntegerField(default=0)
+
+    @classmethod
+    @transaction.atomic
+    def reserve(cls, counts):
+        """Reserves counts[user id] consecutive invoice numbers for every user in counts
+
+        The sequences stay locked by select_for_update until the surrounding
+        transaction ends, so parallel workers never hand out the same number.
+        Returns a dict of user id to the first number reserved for that user."""
+        existing = cls.objects.filter(user__in=list(counts)).values_list(
+            "user", flat=True
+        )
+        missing = set(counts) - set(existing)
+        if missing:
+            # a user without a sequence yet carries on from their last invoice
+            last_invoice_nums = dict(
+                Invoice.objects.filter(user__in=missing)
+                .values_list("user")
+                .annotate(models.Max("invoice_num"))
+                .order_by()
+            )
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        user_id=user_id,
+                        last_invoice_num=last_invoice_nums.get(user_id, 0),
+                    )
+                    for user_id in missing
+                ],
+                ignore_conflicts=True,
+            )
+
+        sequences = cls.objects.select_for_update().in_bulk(list(counts))
+        first_invoice_nums = {}
+        for user_id, count in counts.items():
+            sequence = sequences[user_id]
+            first_invoice_nums[user_id] = sequence.last_invoice_num + 1
+            sequence.last_invoice_num += count
+        cls.objects.bulk_update(sequences.values(), ["last_invoice_num"])
+        return first_invoice_nums
+
+    def __str__(self):
+        return f"{self.user} ({self.last_invoice_num})"
+
+
 class Booking(models.Model):
     """Defines a booking with the given number of lessons, days between lessons and lesson duration, an invoice,
     the user the booking is for, the teacher the booking is for and the given description"""
@@ -179,63 +306,260 @@ class Booking(models.Model):
             MinValueValidator(15, message="A lesson must be at least 15 minutes")
         ],
     )
+    # days of the week the student is available on, see lessons.scheduling
+    weekday_mask = models.PositiveSmallIntegerField(
+        default=ALL_WEEKDAYS,
+        validators=[MinValueValidator(1), MaxValueValidator(ALL_WEEKDAYS)],
+    )
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, blank=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=False)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, blank=False)
     description = models.CharField(max_length=50, blank=True)
-   
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # the bookings list pages through bookings by id, these serve it when
+        # filtering on the student or the teacher
+        indexes = [
+            models.Index(fields=["user", "id"], name="booking_user_id_idx"),
+            models.Index(fields=["teacher", "id"], name="booking_teacher_id_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         self.create_invoice()
         super(Booking, self).save(*args, **kwargs)
 
-    def create_lessons(self):
-        """Creates a set of lessons for the confirmed booking"""
-
-        # Generates a random time of the lesson to start
-        timeForLesson = random.randint(9, 15)
-        startDate = SchoolTerm.objects.first().start_date
-        new_date=startDate+datetime.timedelta(days = self.days_between_lessons)
-        COUNT = 0
-        while COUNT != self.num_of_lessons:
-            try:
-                lesson = Lesson.objects.create(
-                    name=f'{self.user.first_name}{self.teacher.user.first_name}{COUNT}',
-                    date=new_date,
-                    startTime=datetime.time(timeForLesson, 0, 0),
+    def lesson_schedule(self, term_index=None):
+        """Returns the dates the lessons of this booking should take place on
+
+        The first lesson is one interval after the start of the first school
+        term, any date that falls in a holiday is moved to the start of the
+        next term and every lesson is moved onto a day the student is
+        available on."""
+        if term_index is None:
+            term_index = get_term_index()
+        first_term_start = term_index.first_start_date()
+        if first_term_start is None:
+            raise ValidationError("There are no school terms to schedule lessons in")
+
+        start_date = first_term_start + datetime.timedelta(days=self.days_between_lessons)
+        return lesson_dates(
+            start_date,
+            self.days_between_lessons,
+            self.num_of_lessons,
+            term_index,
+            self.weekday_mask,
+        )
+
+    @staticmethod
+    def lesson_schedules(bookings, term_index=None):
+        """Returns the lesson_schedule of every booking in the given list
+
+        The schedules are worked out together with batch_lesson_dates, which
+        is much faster than calling lesson_schedule once per booking."""
+        if term_index is None:
+            term_index = get_term_index()
+        first_term_start = term_index.first_start_date()
+        if first_term_start is None:
+            raise ValidationError("There are no school terms to schedule lessons in")
+
+        booking_indices, dates = batch_lesson_dates(
+            [
+                first_term_start + datetime.timedelta(days=booking.days_between_lessons)
+                for booking in bookings
+            ],
+            [booking.days_between_lessons for booking in bookings],
+            [booking.num_of_lessons for booking in bookings],
+            [booking.weekday_mask for booking in bookings],
+            term_index,
+        )
+        schedules = [[] for _ in bookings]
+        for i, date in zip(booking_indices.tolist(), dates.tolist()):
+            schedules[i].append(date)
+        return schedules
+
+    def teacher_timetable(self, dates):
+        """Loads the timetable of the teacher over the given dates, leaving out
+        the lessons of this booking itself"""
+        if not dates:
+            return TeacherTimetable()
+        return TeacherTimetable.load(
+            [self.teacher_id], min(dates), max(dates), exclude_booking=self.pk
+        )
+
+    def planned_lessons(
+        self, term_index=None, start_times=None, timetable=None, dates=None
+    ):
+        """Builds the unsaved lessons this booking should currently consist of
+
+        The nth lesson starts at the nth of start_times (9am for lessons past
+        the end of that list or without a time), or at the next time the
+        teacher is free that day if they already have a lesson then. If the
+        teacher is busy for the rest of the day it starts at the first free
+        time from 9am instead."""
+        if dates is None:
+            dates = self.lesson_schedule(term_index)
+        if timetable is None:
+            timetable = self.teacher_timetable(dates)
+        if start_times is None:
+            start_times = []
+
+        starts = []
+        for i, date in enumerate(dates):
+            if i < len(start_times) and start_times[i] is not None:
+                preferred_start = to_minutes(start_times[i])
+            else:
+                preferred_start = FIRST_LESSON_START
+            start = timetable.next_free_start(
+                self.teacher_id, date, preferred_start, self.lesson_duration
+            )
+            if start is None and preferred_start != FIRST_LESSON_START:
+                # no room after the preferred time, try earlier in the day
+                start = timetable.next_free_start(
+                    self.teacher_id, date, FIRST_LESSON_START, self.lesson_duration
+                )
+            if start is None:
+                raise ValidationError(
+                    f"{self.teacher} has no free time for a lesson on {date}"
+                )
+            starts.append(start)
+
+        # only book the teacher once every lesson has found a time
+        lessons = []
+        for count, (date, start) in enumerate(zip(dates, starts)):
+            timetable.add(self.teacher_id, date, start, self.lesson_duration)
+            lessons.append(
+                Lesson(
+                    name=f"{self.user.first_name}{self.teacher.user.first_name}{count}",
+                    date=date,
+                    startTime=from_minutes(start),
                     booking=self,
-                    description = self.description
+                    description=self.description,
+                )
+            )
+        return lessons
+
+    def create_lessons(self, batch_size=None, term_index=None, timetable=None):
+        """Creates a set of lessons for the confirmed booking
+
+        Every lesson is built in memory first and then written with a
+        single batched insert, rather than one query per lesson."""
+        if batch_size is None:
+            batch_size = settings.LESSON_BULK_CREATE_BATCH_SIZE
+        lessons = self.planned_lessons(term_index, timetable=timetable)
+        lessons = Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+        invalidate_rows("lesson", [lesson.pk for lesson in lessons])
+        return lessons
+
+    @transaction.atomic
+    def update_lessons(self, batch_size=None, term_index=None):
+        """Lessons should be updated depending on the changes made to Booking
+
+        The planned lessons are matched in order against the existing ones, so
+        existing lessons keep their ids. Only lessons that changed are updated,
+        missing ones are inserted and surplus ones deleted, each in one batch.
+        Lessons that were edited by hand are left as they are, unless they now
+        clash with another lesson of the teacher, which raises a
+        ValidationError."""
+        if batch_size is None:
+            batch_size = settings.LESSON_BULK_CREATE_BATCH_SIZE
+
+        existing = list(self.lesson_set.order_by("id"))
+        edited = [lesson for lesson in existing if lesson.edited]
+        dates = self.lesson_schedule(term_index)
+        # edited lessons may have been moved outside the planned dates
+        timetable = self.teacher_timetable(dates + [lesson.date for lesson in edited])
+        for lesson in edited:
+            start = to_minutes(lesson.startTime)
+            if timetable.conflicts(
+                self.teacher_id, lesson.date, start, self.lesson_duration
+            ):
+                # the teacher or the duration changed since the lesson was moved
+                raise ValidationError(
+                    f"{self.teacher} already has a lesson at "
+                    f"{lesson.startTime:%H:%M} on {lesson.date}, move the edited "
+                    "lesson first"
                 )
-                lesson.save()
-                COUNT += 1
-                new_date+=datetime.timedelta(days = self.days_between_lessons)
-            except:
-                new_date+=datetime.timedelta(days = self.days_between_lessons)
+            timetable.add(self.teacher_id, lesson.date, start, self.lesson_duration)
+        # each lesson keeps its own time where it can, lessons may have been
+        # moved on their own to get around the teacher's other lessons
+        planned = self.planned_lessons(
+            start_times=[
+                None if lesson.edited else lesson.startTime for lesson in existing
+            ],
+            timetable=timetable,
+            dates=dates,
+        )
+
+        now = timezone.now()
+        changed = []
+        changed_fields = {"updated_at"}
+        for lesson, target in zip(existing, planned):
+            if lesson.edited:
                 continue
+            fields = [
+                f
+                for f in ("name", "date", "startTime", "description")
+                if getattr(lesson, f) != getattr(target, f)
+            ]
+            if fields:
+                for f in fields:
+                    setattr(lesson, f, getattr(target, f))
+                # bulk_update() does not set auto_now fields
+                lesson.updated_at = now
+                changed.append(lesson)
+                changed_fields.update(fields)
+        if changed:
+            Lesson.objects.bulk_update(
+                changed, sorted(changed_fields), batch_size=batch_size
+            )
+            invalidate_rows("lesson", [lesson.pk for lesson in changed])
+
+        surplus = existing[len(planned):]
+        if surplus:
+            Lesson.objects.filter(id__in=[lesson.id for lesson in surplus]).delete()
+
+        missing = planned[len(existing):]
+        if missing:
+            Lesson.objects.bulk_create(missing, batch_size=batch_size)
+            invalidate_rows("lesson", [lesson.pk for lesson in missing])
 
-    def update_lessons(self):
-        """Lessons should be updated depending on the changes made to Booking"""
-        self.lesson_set.all().delete()
-        self.create_lessons()
-        
     def create_invoice(self):
         """Invoice should be created for Lesson that has been created"""
         try:
             if self.invoice is not None:
                 pass
         except ObjectDoesNotExist:
-            costOfBooking = self.lesson_duration * self.num_of_lessons / 10
             self.invoice = Invoice.objects.create(
                 user=self.user,
-                student_num=self.user.pk + 1000,
-                invoice_num=self.user.invoice_set.all().count() + 1,
-                price=Money(costOfBooking, "GBP"),
+                invoice_num=InvoiceSequence.reserve({self.user_id: 1})[self.user_id],
+                price=self.calculate_price(),
             )
-            self.invoice.save()
+
+    def calculate_price(self):
+        """Returns the cost of the booking"""
+        costOfBooking = lesson_tariff() * self.lesson_duration * self.num_of_lessons
+        # half pennies round up, as Round() does in price_expression
+        return Money(
+            costOfBooking.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), "GBP"
+        )
+
+    @staticmethod
+    def price_expression():
+        """Returns calculate_price as a database expression, for working out
+        the prices of many bookings in one query"""
+        return Round(
+            models.F("lesson_duration")
+            * models.F("num_of_lessons")
+            * models.Value(lesson_tariff()),
+            2,
+            output_field=models.DecimalField(max_digits=5, decimal_places=2),
+        )
 
     def update_invoice(self):
         """Invoice should be updated depending on the changes made to Lesson"""
-        costOfBooking = self.lesson_duration * self.num_of_lessons / 10
-        self.invoice.price = Money(costOfBooking, "GBP")
+        self.invoice.price = self.calculate_price()
+        self.invoice.save(update_fields=["price", "updated_at"])
 
 
 class Lesson(models.Model):
@@ -247,21 +571,29 @@ class Lesson(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, blank=False)
     lessonCreatedAt = models.TimeField(auto_now_add=True)
     description = models.CharField(max_length=500, blank=True)
+    # set once an admin changes the lesson by hand, so rescheduling the
+    # booking leaves it alone
+    edited = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def clean(self):
         # Check that date is within one of the school terms
         if self.date is not None:
-            currentTerm = None
-            schoolTerms = SchoolTerm.objects.all()
-            for term in schoolTerms:
-                if self.date > term.start_date and self.date < term.end_date:
-                    currentTerm = term
-            if currentTerm is None:
+            if not get_term_index().contains(self.date):
                 raise ValidationError("Date of lesson does not lie in the terms")
 
     class Meta:
         # Model options
         ordering = ["-lessonCreatedAt"]
+        indexes = [
+            # backs the teacher timetable lookups in lessons.scheduling
+            models.Index(
+                fields=["booking", "date", "startTime"],
+                name="lesson_booking_date_idx",
+            ),
+            # finding the bookings with a lesson in a date range
+            models.Index(fields=["date", "booking"], name="lesson_date_booking_idx"),
+        ]
 
 
 class RequestForLessons(models.Model):
@@ -277,6 +609,7 @@ class RequestForLessons(models.Model):
 
     fulfilled = models.BooleanField(default=False)
     request_created_at = models.DateTimeField(auto_now_add=True, blank=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     no_of_lessons = models.IntegerField(
         default=10,  # default is 10 lessons (per year?)
@@ -306,10 +639,21 @@ class RequestForLessons(models.Model):
     class Meta:
         # Model options
         ordering = ["-request_created_at"]
+        indexes = [
+            models.Index(
+                fields=["fulfilled", "-request_created_at"],
+                name="request_fulfilled_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student}: {self.no_of_lessons} lessons"
 
+    @property
+    def weekday_mask(self):
+        """The availability of the student as a weekday mask"""
+        return availability_to_mask(self.availability)
+
     def clean(self):
         valid_days = ["", "MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
         availability_list = self.availability.split(",")
@@ -325,11 +669,20 @@ class SchoolTerm(models.Model):
     start_date = models.DateField(blank=False)
     end_date = models.DateField(blank=False)
 
-    # vvv i only use this for model validation
-    _editing = models.BooleanField(default=False)
-
     class Meta:
         ordering = ["start_date"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(start_date__lte=models.F("end_date")),
+                name="school_term_start_before_end",
+            ),
+        ]
+        indexes = [
+            # backs the overlap check in clean()
+            models.Index(
+                fields=["start_date", "end_date"], name="school_term_dates_idx"
+            ),
+        ]
 
     def clean(self):
         """Checks if the created school term overlap with one another"""
@@ -337,15 +690,10 @@ class SchoolTerm(models.Model):
             if self.start_date > self.end_date:
                 raise ValidationError("Start date cannot be greater than end date")
 
-            # this case applies only when editing a school term
-            # I only want to check overlap against visible school terms
-            # while editing a term, it will be marked with "editing=True"
-            # so as not to check overlapping against itself
-            all_terms = SchoolTerm.objects.filter(_editing=False)
-
-            for term in all_terms:
-                if (
-                    self.start_date <= term.end_date
-                    and self.end_date >= term.start_date
-                ):
-                    raise ValidationError("School terms cannot overlap!")
+            # a single EXISTS query, leaving out this term itself when it is
+            # being edited
+            overlapping_terms = SchoolTerm.objects.filter(
+                start_date__lte=self.end_date, end_date__gte=self.start_date
+            ).exclude(pk=self.pk)
+            if overlapping_terms.exists():
+                raise ValidationError("School terms cannot overlap!")
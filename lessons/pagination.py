@@ -0,0 +1,23 @@
+"""Keyset pagination for the long lists of the site"""
+
+
+def keyset_page(queryset, after, page_size):
+    """Returns a page of the queryset in primary key order starting after the
+    given key, and the key to continue from on the next page, or None on the
+    last page
+
+    Unlike OFFSET, filtering on pk > after uses the primary key index, so
+    every page costs the same however far into the list it is. after comes
+    straight from the query string, anything that is not a number is treated
+    as the start of the list."""
+    try:
+        after = int(after)
+    except (TypeError, ValueError):
+        after = None
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    # fetching one extra row tells us if there is a next page without a COUNT
+    rows = list(queryset.order_by("pk")[: page_size + 1])
+    if len(rows) > page_size:
+        return rows[:page_size], rows[page_size - 1].pk
+    return rows, None
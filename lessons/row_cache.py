@@ -0,0 +1,51 @@
+"""Version tokens for the cached rows of the long lists
+
+Every cached row fragment is keyed by the row and a version token. Changing a
+row drops its token, so the next render makes a fresh token and never finds
+the stale fragment. A token that has fallen out of the cache is simply made
+again, which can only cause a miss, never a stale hit."""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(name, key):
+    return f"lessons:row_version:{name}:{key}"
+
+
+def row_versions(name, keys):
+    """Returns a dict of key to the current version token of every given row,
+    with one cache lookup"""
+    cache_keys = {key: _version_key(name, key) for key in keys}
+    found = cache.get_many(cache_keys.values())
+    versions = {}
+    missing = {}
+    for key, cache_key in cache_keys.items():
+        if cache_key in found:
+            versions[key] = found[cache_key]
+        else:
+            versions[key] = missing[cache_key] = uuid.uuid4().hex
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def invalidate_rows(name, keys):
+    """Drops the version tokens of the given rows so their cached fragments
+    are no longer used
+
+    Signals call this for single saves and deletes, anything that writes rows
+    with update(), bulk_create() or bulk_update() has to call it itself.
+    Inside a transaction the tokens are dropped once it commits, so a render
+    in between cannot cache the old row under a fresh token."""
+    cache_keys = [_version_key(name, key) for key in keys]
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def set_row_versions(rows, name, key=lambda row: row.pk):
+    """Sets row_version on every row to the token its fragment is cached under"""
+    versions = row_versions(name, [key(row) for row in rows])
+    for row in rows:
+        row.row_version = versions[key(row)]
+    return rows
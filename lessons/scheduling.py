@@ -0,0 +1,281 @@
+"""Helpers for placing lessons on the school calendar"""
+from bisect import bisect_left, bisect_right
+import datetime
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+import numpy as np
+
+WEEKDAYS = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+
+# availability is stored as a 7-bit mask, bit 0 is monday and bit 6 is sunday
+# so a date is available when (mask >> date.weekday()) & 1 is set
+ALL_WEEKDAYS = 0b1111111
+
+NOT_ENOUGH_TERM_TIME = "There is not enough term time left to schedule all the lessons"
+
+# lessons are given between 9am and 6pm, in minutes after midnight
+FIRST_LESSON_START = 9 * 60
+LAST_LESSON_END = 18 * 60
+
+
+def to_minutes(time):
+    """Converts a datetime.time into minutes after midnight"""
+    return time.hour * 60 + time.minute
+
+
+def from_minutes(minutes):
+    """Converts minutes after midnight into a datetime.time"""
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def availability_to_mask(availability):
+    """Converts a comma separated availability string such as "TUE,SAT,SUN"
+    into a weekday mask"""
+    mask = 0
+    for day in availability.split(","):
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+class SchoolTermIndex:
+    """Sorted in-memory view of the school terms
+
+    School terms never overlap, so sorting them by start date gives two
+    parallel lists of start and end dates that can be searched with bisect.
+    Both term bounds are part of the term."""
+
+    def __init__(self, terms):
+        intervals = sorted(terms)
+        self.start_dates = [start_date for start_date, _ in intervals]
+        self.end_dates = [end_date for _, end_date in intervals]
+
+    @classmethod
+    def load(cls):
+        """Builds the index from every school term in the database with one query"""
+        from .models import SchoolTerm
+
+        return cls(SchoolTerm.objects.values_list("start_date", "end_date"))
+
+    def __len__(self):
+        return len(self.start_dates)
+
+    def first_start_date(self):
+        """Returns the start date of the earliest term, or None if there are no terms"""
+        if not self.start_dates:
+            return None
+        return self.start_dates[0]
+
+    def contains(self, date):
+        """Checks if the given date lies within one of the school terms"""
+        i = bisect_right(self.start_dates, date)
+        return i > 0 and date <= self.end_dates[i - 1]
+
+    def next_term_date(self, date):
+        """Returns the first date on or after the given date that lies in a term
+
+        Dates in a holiday jump to the start of the following term. Raises a
+        ValidationError for dates after the last term, as no lesson can take
+        place then. Without any terms there is nothing to check against, so
+        the date is returned unchanged."""
+        i = bisect_right(self.start_dates, date)
+        if i > 0 and date <= self.end_dates[i - 1]:
+            return date
+        if i < len(self.start_dates):
+            return self.start_dates[i]
+        if self.start_dates:
+            raise ValidationError(NOT_ENOUGH_TERM_TIME)
+        return date
+
+
+# process-wide cache of the school terms, see get_term_index
+_term_index = None
+_term_index_loaded_at = None
+
+
+def get_term_index():
+    """Returns the cached SchoolTermIndex, loading it if needed
+
+    The index is dropped once a school term is saved or deleted (see
+    lessons.signals), so lookups on the hot path cost no queries. Other
+    processes do not get those signals, which is why the cache also expires
+    after SCHOOL_TERM_CACHE_TIMEOUT seconds."""
+    global _term_index, _term_index_loaded_at
+    now = time.monotonic()
+    if (
+        _term_index is None
+        or now - _term_index_loaded_at > settings.SCHOOL_TERM_CACHE_TIMEOUT
+    ):
+        _term_index = SchoolTermIndex.load()
+        _term_index_loaded_at = now
+    return _term_index
+
+
+def invalidate_term_index():
+    """Drops the cached SchoolTermIndex so the next lookup reloads it"""
+    global _term_index
+    _term_index = None
+
+
+def lesson_dates(
+    start_date,
+    days_between_lessons,
+    num_of_lessons,
+    term_index,
+    weekday_mask=ALL_WEEKDAYS,
+):
+    """Returns the dates of num_of_lessons lessons, spaced days_between_lessons
+    apart, moved out of the holidays using the given SchoolTermIndex and onto
+    the next weekday allowed by weekday_mask"""
+    if not weekday_mask & ALL_WEEKDAYS:
+        # no availability given, any day will do
+        weekday_mask = ALL_WEEKDAYS
+    step = datetime.timedelta(days=days_between_lessons)
+    one_day = datetime.timedelta(days=1)
+    dates = []
+    date = start_date
+    for _ in range(num_of_lessons):
+        date = term_index.next_term_date(date)
+        while not weekday_mask >> date.weekday() & 1:
+            date = term_index.next_term_date(date + one_day)
+        dates.append(date)
+        date += step
+    return dates
+
+
+def _next_term_dates(dates, term_starts, term_ends):
+    """Vectorised SchoolTermIndex.next_term_date over an array of datetime64 dates"""
+    if not len(term_starts):
+        return dates
+    i = np.searchsorted(term_starts, dates, side="right")
+    in_term = (i > 0) & (dates <= term_ends[np.maximum(i - 1, 0)])
+    jump = ~in_term & (i < len(term_starts))
+    return np.where(jump, term_starts[np.minimum(i, len(term_starts) - 1)], dates)
+
+
+def batch_lesson_dates(
+    start_dates, days_between_lessons, num_of_lessons, weekday_masks, term_index
+):
+    """Works out the lesson dates of many bookings at once
+
+    Gives the same dates as calling lesson_dates for every booking, but steps
+    all the bookings forward together with NumPy datetime64 arithmetic, so the
+    Python loop runs once per lesson number rather than once per lesson.
+
+    Returns two arrays with a row per lesson, ordered by booking and then by
+    date: the index of the booking in the arguments, and the date as a
+    datetime64. Like lesson_dates it raises a ValidationError if any booking
+    has lessons left after the last term."""
+    dates = np.array(start_dates, dtype="datetime64[D]")
+    steps = np.array(days_between_lessons, dtype="timedelta64[D]")
+    counts = np.array(num_of_lessons, dtype=np.int64)
+    masks = np.array(weekday_masks, dtype=np.int64) & ALL_WEEKDAYS
+    # no availability given, any day will do
+    masks[masks == 0] = ALL_WEEKDAYS
+    term_starts = np.array(term_index.start_dates, dtype="datetime64[D]")
+    term_ends = np.array(term_index.end_dates, dtype="datetime64[D]")
+    one_day = np.timedelta64(1, "D")
+
+    max_count = int(counts.max()) if len(counts) else 0
+    schedule = np.empty((len(dates), max_count), dtype="datetime64[D]")
+    for k in range(max_count):
+        dates = _next_term_dates(dates, term_starts, term_ends)
+        while True:
+            # 1970-01-01 was a thursday, which is weekday 3
+            weekdays = (dates.astype(np.int64) + 3) % 7
+            unavailable = (masks >> weekdays & 1) == 0
+            if not unavailable.any():
+                break
+            dates = np.where(
+                unavailable,
+                _next_term_dates(dates + one_day, term_starts, term_ends),
+                dates,
+            )
+        if len(term_ends) and (dates[k < counts] > term_ends[-1]).any():
+            raise ValidationError(NOT_ENOUGH_TERM_TIME)
+        schedule[:, k] = dates
+        dates = dates + steps
+
+    used = np.arange(max_count) < counts[:, None]
+    booking_indices = np.repeat(np.arange(len(counts)), counts)
+    return booking_indices, schedule[used]
+
+
+class TeacherTimetable:
+    """In-memory index of the lessons teachers already have
+
+    For every (teacher id, date) pair it keeps a sorted list of disjoint
+    (start minute, end minute) intervals, so checking a new lesson against
+    the timetable is a bisect rather than a scan over the teacher's lessons."""
+
+    def __init__(self):
+        self._intervals = {}
+
+    @classmethod
+    def load(
+        cls,
+        teacher_ids,
+        start_date,
+        end_date,
+        exclude_booking=None,
+        exclude_lesson=None,
+    ):
+        """Builds the timetable of the given teachers between two dates with one query"""
+        from .models import Lesson
+
+        lessons = Lesson.objects.filter(
+            booking__teacher__in=teacher_ids, date__range=(start_date, end_date)
+        )
+        if exclude_booking is not None:
+            lessons = lessons.exclude(booking=exclude_booking)
+        if exclude_lesson is not None:
+            lessons = lessons.exclude(pk=exclude_lesson)
+
+        timetable = cls()
+        for teacher_id, date, start_time, duration in lessons.values_list(
+            "booking__teacher", "date", "startTime", "booking__lesson_duration"
+        ).order_by():
+            timetable.add(teacher_id, date, to_minutes(start_time), duration)
+        return timetable
+
+    def add(self, teacher_id, date, start, duration):
+        """Books the teacher from start for duration minutes on the given date"""
+        intervals = self._intervals.setdefault((teacher_id, date), [])
+        end = start + duration
+        # merge with any lessons this one overlaps so the intervals stay disjoint
+        i = bisect_right(intervals, (start,))
+        if i > 0 and intervals[i - 1][1] >= start:
+            i -= 1
+        j = i
+        while j < len(intervals) and intervals[j][0] <= end:
+            start = min(start, intervals[j][0])
+            end = max(end, intervals[j][1])
+            j += 1
+        intervals[i:j] = [(start, end)]
+
+    def _overlapping(self, teacher_id, date, start, end):
+        """Returns the booked interval overlapping [start, end), if there is one"""
+        intervals = self._intervals.get((teacher_id, date))
+        if not intervals:
+            return None
+        # the only interval that can overlap is the last one starting before end
+        i = bisect_left(intervals, (end,))
+        if i > 0 and intervals[i - 1][1] > start:
+            return intervals[i - 1]
+        return None
+
+    def conflicts(self, teacher_id, date, start, duration):
+        """Checks if the teacher already has a lesson overlapping the given one"""
+        return self._overlapping(teacher_id, date, start, start + duration) is not None
+
+    def next_free_start(self, teacher_id, date, start, duration):
+        """Returns the earliest start at or after the given one at which the
+        teacher is free for duration minutes, or None if the day is full"""
+        while start + duration <= LAST_LESSON_END:
+            interval = self._overlapping(teacher_id, date, start, start + duration)
+            if interval is None:
+                return start
+            start = interval[1]
+        return None
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .balances import invalidate_balances
+from .models import Booking, Invoice, Lesson, RequestForLessons, SchoolTerm
+from .row_cache import invalidate_rows
+from .scheduling import invalidate_term_index
+
+
+@receiver(post_save, sender=SchoolTerm)
+@receiver(post_delete, sender=SchoolTerm)
+def school_term_changed(sender, instance, **kwargs):
+    """Drops the cached school terms once the change to a term is committed
+
+    Dropping them straight away would let another thread reload and keep
+    the old terms before the transaction commits."""
+    transaction.on_commit(invalidate_term_index)
+    invalidate_rows("schoolterm", [instance.pk])
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invoice_changed(sender, instance, **kwargs):
+    """Drops the cached balances the invoice counts towards and the cached
+    booking rows showing it"""
+    invalidate_balances([instance.user_id])
+    invalidate_rows("invoice", [instance.urn])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    invalidate_rows("booking", [instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    invalidate_rows("lesson", [instance.pk])
+
+
+@receiver(post_save, sender=RequestForLessons)
+@receiver(post_delete, sender=RequestForLessons)
+def request_changed(sender, instance, **kwargs):
+    invalidate_rows("request", [instance.pk])
@@ -0,0 +1,111 @@
+"""Tests of the fulfill_requests command"""
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from lessons.fulfillment import fulfill_requests
+from lessons.models import Booking, Invoice, Lesson, RequestForLessons, User
+from lessons.tests.helpers import LessonsTestCase, create_test_terms
+
+
+class FulfillRequestsCommandTestCase(LessonsTestCase):
+    """Tests of the fulfill_requests command"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_teacher.json",
+        "lessons/tests/fixtures/default_user.json",
+        "lessons/tests/fixtures/default_request.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        create_test_terms()
+        self.user = User.objects.get(pk=2)
+        self.other_request = RequestForLessons.objects.create(
+            user=self.user,
+            availability="MON,WED,SAT",
+            no_of_lessons=5,
+            days_between_lessons=7,
+            lesson_duration=30,
+        )
+
+    def test_fulfill_requests(self):
+        bookings, failures = fulfill_requests({1: 5, self.other_request.id: 5})
+        self.assertEqual(failures, {})
+        self.assertEqual(len(bookings), 2)
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(Invoice.objects.count(), 2)
+        self.assertEqual(Lesson.objects.count(), 10 + 5)
+        self.assertFalse(RequestForLessons.objects.filter(fulfilled=False).exists())
+        self.assertEqual(
+            sorted(Invoice.objects.values_list("invoice_num", flat=True)), [1, 2]
+        )
+        for booking in Booking.objects.all():
+            self.assertEqual(booking.invoice.price, booking.calculate_price())
+            self.assertEqual(booking.lesson_set.count(), booking.num_of_lessons)
+
+    def test_fulfilled_requests_do_not_double_book_the_teacher(self):
+        fulfill_requests({1: 5, self.other_request.id: 5})
+        slots = list(Lesson.objects.values_list("date", "startTime"))
+        self.assertEqual(len(slots), len(set(slots)))
+
+    def test_query_count_does_not_depend_on_the_number_of_requests(self):
+        for _ in range(5):
+            RequestForLessons.objects.create(
+                user=self.user, availability="TUE", no_of_lessons=8
+            )
+        ids = list(RequestForLessons.objects.values_list("id", flat=True))
+        # savepoint, requests, teachers, terms, timetable, invoice numbers
+        # (savepoint, sequences, last invoices, new sequences, lock, update,
+        # release), invoices, bookings, lessons, fulfilled requests, release
+        with self.assertNumQueries(17):
+            bookings, failures = fulfill_requests({id: 5 for id in ids})
+        self.assertEqual(len(bookings), 7)
+
+    def test_failures_do_not_abort_the_batch(self):
+        RequestForLessons.objects.filter(pk=1).update(fulfilled=True)
+        bookings, failures = fulfill_requests(
+            {1: 5, 999: 5, self.other_request.id: 5}
+        )
+        self.assertEqual(len(bookings), 1)
+        self.assertEqual(set(failures), {1, 999})
+        self.assertTrue(RequestForLessons.objects.get(pk=self.other_request.id).fulfilled)
+
+    def test_request_without_enough_term_time_fails_alone(self):
+        long_request = RequestForLessons.objects.create(
+            user=self.user, availability="MON", no_of_lessons=100
+        )
+        bookings, failures = fulfill_requests(
+            {1: 5, long_request.id: 5, self.other_request.id: 5}
+        )
+        self.assertEqual(len(bookings), 2)
+        self.assertEqual(set(failures), {long_request.id})
+        self.assertIn("not enough term time", failures[long_request.id])
+        self.assertFalse(RequestForLessons.objects.get(pk=long_request.id).fulfilled)
+
+    def test_unknown_teacher_is_a_failure(self):
+        bookings, failures = fulfill_requests({1: 999})
+        self.assertEqual(bookings, [])
+        self.assertIn(1, failures)
+        self.assertFalse(RequestForLessons.objects.get(pk=1).fulfilled)
+
+    def test_command_reports_failures(self):
+        out = StringIO()
+        call_command("fulfill_requests", "1:5", "999:5", stdout=out)
+        self.assertIn("Fulfilled 1 requests", out.getvalue())
+        self.assertIn("Request 999 not fulfilled", out.getvalue())
+        self.assertTrue(RequestForLessons.objects.get(pk=1).fulfilled)
+
+    def test_command_fulfills_every_request_with_auto(self):
+        out = StringIO()
+        call_command("fulfill_requests", "--auto", stdout=out)
+        self.assertIn("Fulfilled 2 requests", out.getvalue())
+        self.assertFalse(RequestForLessons.objects.filter(fulfilled=False).exists())
+
+    def test_command_needs_assignments(self):
+        with self.assertRaises(CommandError):
+            call_command("fulfill_requests", stdout=StringIO())
+
+    def test_command_rejects_malformed_assignments(self):
+        with self.assertRaises(CommandError):
+            call_command("fulfill_requests", "1-5", stdout=StringIO())
@@ -0,0 +1,100 @@
+"""Tests of the reconcile_payments command"""
+from io import StringIO
+import os
+import tempfile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from djmoney.money import Money
+
+from lessons.models import Invoice, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class ReconcilePaymentsCommandTestCase(LessonsTestCase):
+    """Tests of the reconcile_payments command"""
+
+    fixtures = ["lessons/tests/fixtures/default_student.json"]
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.get(email="john.doe@example.org")
+        self.invoices = [
+            Invoice.objects.create(
+                user=self.user, invoice_num=num, price=Money(10 * num, "GBP")
+            )
+            for num in range(1, 5)
+        ]
+
+    def _reconcile(self, lines, *args):
+        statement = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, newline=""
+        )
+        with statement:
+            statement.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, statement.name)
+        out = StringIO()
+        call_command("reconcile_payments", statement.name, *args, stdout=out)
+        return out.getvalue()
+
+    def _paid_urns(self):
+        return set(Invoice.objects.filter(is_paid=True).values_list("urn", flat=True))
+
+    def test_matching_lines_are_paid(self):
+        first, second = self.invoices[0].urn, self.invoices[1].urn
+        output = self._reconcile(
+            [
+                "date,description,amount",
+                f"2022-12-01,PAYMENT REF {first},10.00",
+                f"2022-12-01,{second} lessons,20.00",
+            ]
+        )
+        self.assertEqual(self._paid_urns(), {first, second})
+        self.assertIn("Marked 2 invoices paid, 0 lines did not match", output)
+
+    def test_mismatches_are_reported(self):
+        paid = self.invoices[0]
+        Invoice.objects.filter(pk=paid.pk).update(is_paid=True)
+        output = self._reconcile(
+            [
+                "date,description,amount",
+                f"2022-12-01,{paid.urn},10.00",
+                "2022-12-01,no reference here,5.00",
+                "2022-12-01,9999-1,5.00",
+                f"2022-12-01,{self.invoices[1].urn},1.00",
+                f"2022-12-01,{self.invoices[2].urn},30.00",
+                f"2022-12-01,{self.invoices[2].urn},30.00",
+            ]
+        )
+        self.assertIn(f"2,{paid.urn},no unpaid invoice with this reference", output)
+        self.assertIn("3,,no reference number", output)
+        self.assertIn("4,9999-1,no unpaid invoice with this reference", output)
+        self.assertIn(f"5,{self.invoices[1].urn},amount 1.00 does not match", output)
+        self.assertIn(f"7,{self.invoices[2].urn},paid more than once", output)
+        self.assertEqual(self._paid_urns(), {paid.urn, self.invoices[2].urn})
+        self.assertIn("Marked 1 invoices paid, 5 lines did not match", output)
+
+    def test_statement_without_amounts_pays_by_reference(self):
+        self._reconcile([f"{invoice.urn}" for invoice in self.invoices])
+        self.assertEqual(
+            self._paid_urns(), {invoice.urn for invoice in self.invoices}
+        )
+
+    def test_query_count_depends_on_chunks_not_lines(self):
+        lines = ["reference"] + [invoice.urn for invoice in self.invoices]
+        # a lookup and an update per chunk of 2 lines
+        with self.assertNumQueries(6):
+            self._reconcile(lines, "--chunk-size", "2")
+        self.assertEqual(len(self._paid_urns()), 4)
+
+    def test_report_can_be_written_to_a_file(self):
+        report = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+        report.close()
+        self.addCleanup(os.remove, report.name)
+        output = self._reconcile(["reference", "9999-1"], "--report", report.name)
+        with open(report.name) as report_file:
+            self.assertIn("2,9999-1,no unpaid invoice", report_file.read())
+        self.assertNotIn("9999-1", output)
+
+    def test_missing_statement_is_an_error(self):
+        with self.assertRaises(CommandError):
+            call_command("reconcile_payments", "/no/such/statement.csv")
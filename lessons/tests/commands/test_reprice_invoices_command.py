@@ -0,0 +1,89 @@
+"""Tests of the reprice_invoices command"""
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+from djmoney.money import Money
+
+from lessons.models import Booking, Invoice, Teacher, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class RepriceInvoicesCommandTestCase(LessonsTestCase):
+    """Tests of the reprice_invoices command"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.get(email="john.doe@example.org")
+        teacher = Teacher.objects.get(user__email="jane.doe@example.org")
+        self.bookings = []
+        for num_of_lessons in (4, 10):
+            booking = Booking(
+                num_of_lessons=num_of_lessons,
+                user=self.user,
+                teacher=teacher,
+                days_between_lessons=7,
+                lesson_duration=45,
+            )
+            booking.create_invoice()
+            booking.save()
+            self.bookings.append(booking)
+
+    def _prices(self):
+        return [
+            Invoice.objects.get(pk=booking.invoice_id).price
+            for booking in self.bookings
+        ]
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.12")
+    def test_unpaid_invoices_are_repriced(self):
+        out = StringIO()
+        call_command("reprice_invoices", stdout=out)
+        self.assertEqual(
+            self._prices(), [Money("21.60", "GBP"), Money("54.00", "GBP")]
+        )
+        self.assertIn("Repriced 2 unpaid invoices", out.getvalue())
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.12")
+    def test_paid_invoices_keep_their_price(self):
+        Invoice.objects.filter(pk=self.bookings[0].invoice_id).update(is_paid=True)
+        call_command("reprice_invoices", stdout=StringIO())
+        self.assertEqual(
+            self._prices(), [Money("18.00", "GBP"), Money("54.00", "GBP")]
+        )
+
+    def test_unchanged_tariff_reprices_nothing(self):
+        self.assertEqual(Invoice.objects.reprice(), 0)
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.125")
+    def test_half_penny_prices_are_not_repriced(self):
+        booking = Booking(
+            num_of_lessons=1,
+            user=self.user,
+            teacher=self.bookings[0].teacher,
+            days_between_lessons=7,
+            lesson_duration=45,
+        )
+        booking.create_invoice()
+        booking.save()
+        self.assertEqual(Invoice.objects.filter(pk=booking.invoice_id).reprice(), 0)
+        self.assertEqual(
+            Invoice.objects.get(pk=booking.invoice_id).price, Money("5.63", "GBP")
+        )
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.12")
+    def test_repricing_is_a_single_update(self):
+        # affected users, update
+        with self.assertNumQueries(2):
+            Invoice.objects.reprice()
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.12")
+    def test_repriced_invoices_match_calculate_price(self):
+        Invoice.objects.reprice()
+        self.assertEqual(
+            self._prices(), [booking.calculate_price() for booking in self.bookings]
+        )
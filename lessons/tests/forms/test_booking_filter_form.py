@@ -0,0 +1,76 @@
+"""Unit tests of the booking filter form"""
+import datetime
+from lessons.forms import BookingFilterForm
+from lessons.models import Booking, Invoice, Lesson, SchoolTerm, Teacher, User
+from lessons.tests.helpers import LessonsTestCase, create_test_bookings
+
+
+class BookingFilterFormTestCase(LessonsTestCase):
+    """Unit tests of the booking filter form"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+        "lessons/tests/fixtures/default_director.json",
+        "lessons/tests/fixtures/other_students.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2022, 9, 1),
+            end_date=datetime.date(2022, 10, 21),
+        )
+        self.student = User.objects.get(email="john.doe@example.org")
+        self.director = User.objects.get(email="bob.dylan@example.org")
+        create_test_bookings(3)
+        self.bookings = list(Booking.objects.order_by("id"))
+
+    def _filtered(self, data, user=None):
+        form = BookingFilterForm(data, user=user or self.director)
+        self.assertTrue(form.is_valid())
+        return list(form.filter(Booking.objects.order_by("id")))
+
+    def test_empty_form_keeps_every_booking(self):
+        self.assertEqual(self._filtered({}), self.bookings)
+
+    def test_non_admins_cannot_filter_by_student_or_teacher(self):
+        form = BookingFilterForm(user=self.student)
+        self.assertNotIn("student", form.fields)
+        self.assertNotIn("teacher", form.fields)
+
+    def test_filter_by_student(self):
+        self.assertEqual(self._filtered({"student": self.student.email}), self.bookings)
+        self.assertEqual(self._filtered({"student": "nobody@example.org"}), [])
+
+    def test_filter_by_teacher(self):
+        teacher = self.bookings[1].teacher
+        self.assertEqual(self._filtered({"teacher": teacher.pk}), [self.bookings[1]])
+
+    def test_filter_by_unpaid(self):
+        Invoice.objects.filter(pk=self.bookings[0].invoice_id).update(is_paid=True)
+        self.assertEqual(self._filtered({"unpaid": "on"}), self.bookings[1:])
+
+    def test_filter_by_lesson_dates(self):
+        Lesson.objects.filter(booking=self.bookings[2]).update(
+            date=datetime.date(2023, 1, 10)
+        )
+        self.assertEqual(
+            self._filtered({"lessons_from": "2023-01-01"}), [self.bookings[2]]
+        )
+        self.assertEqual(
+            self._filtered({"lessons_to": "2022-12-31"}), self.bookings[:2]
+        )
+        self.assertEqual(
+            self._filtered(
+                {"lessons_from": "2023-01-11", "lessons_to": "2023-02-01"}
+            ),
+            [],
+        )
+
+    def test_form_rejects_backwards_date_range(self):
+        form = BookingFilterForm(
+            {"lessons_from": "2023-01-11", "lessons_to": "2023-01-01"},
+            user=self.director,
+        )
+        self.assertFalse(form.is_valid())
@@ -1,18 +1,19 @@
 """Unit tests for the create admin form"""
-from django.test import TestCase
 from django import forms
 from django.contrib.auth.hashers import check_password
 
 from lessons.forms import CreateAdminForm
 from lessons.models import SchoolAdmin, User
+from lessons.tests.helpers import LessonsTestCase
 
 # Create your tests here.
 
 
-class CreateAdminFormTestCase(TestCase):
+class CreateAdminFormTestCase(LessonsTestCase):
     """Unit tests for the create admin form"""
 
     def setUp(self):
+        super().setUp()
         self.form_input = {
             "first_name": "Bob",
             "last_name": "Dylan",
@@ -1,15 +1,15 @@
 from django.db import IntegrityError
-from django.test import TestCase
 from django import forms
 
 from lessons.forms import RequestForLessonsForm
 from lessons.models import RequestForLessons, User
+from lessons.tests.helpers import LessonsTestCase
 
 
 # Create your tests here.
 
 
-class RequestForLessonsFormTestCase(TestCase):
+class RequestForLessonsFormTestCase(LessonsTestCase):
     """Unit tests for the request for lessons form"""
 
     fixtures = [
@@ -17,6 +17,7 @@ class RequestForLessonsFormTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.form_input = {
             "no_of_lessons": 10,
             "availability_field": ["MON", "TUE", "SAT"],
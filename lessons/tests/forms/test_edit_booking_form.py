@@ -1,12 +1,11 @@
 from django.core.exceptions import ValidationError
-from django.test import TestCase
 from django import forms
 from lessons.forms import EditBookingForm
-from lessons.models import SchoolTerm, Booking, User, Teacher
+from lessons.models import Booking, User, Teacher
 from djmoney.money import Money
-import datetime
+from lessons.tests.helpers import LessonsTestCase, create_test_terms
 
-class EditBookingFormTestCase(TestCase):
+class EditBookingFormTestCase(LessonsTestCase):
     """Unit tests for editing booking form"""
 
     fixtures = [
@@ -14,13 +13,11 @@ class EditBookingFormTestCase(TestCase):
         "lessons/tests/fixtures/default_teacher.json",
     ]
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(pk=2)
         self.teacher = Teacher.objects.get(pk=5)
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
         self.booking = Booking(
             num_of_lessons=10,
             user=self.user,
@@ -126,4 +123,34 @@ class EditBookingFormTestCase(TestCase):
         self.assertEqual(before_count,after_count)
         self.assertEqual(booking.teacher,self.form_input['teacher'])
         self.assertEqual(booking.num_of_lessons,self.form_input['num_of_lessons'])
-        self.assertEqual(booking.days_between_lessons,self.form_input['days_between_lessons'])
\ No newline at end of file
+        self.assertEqual(booking.days_between_lessons,self.form_input['days_between_lessons'])
+    def test_form_rejects_a_teacher_busy_at_an_edited_lesson(self):
+        user_teacher = User.objects.create_user(
+            "other.teacher@example.org",
+            first_name="Other",
+            last_name="Teacher",
+            password="TestPassword123",
+        )
+        other_teacher = Teacher.objects.create(
+            user=user_teacher, school_name="Test School"
+        )
+        other_booking = Booking.objects.create(
+            num_of_lessons=10,
+            user=self.user,
+            teacher=other_teacher,
+            description="Piano lesson",
+            days_between_lessons=7,
+            lesson_duration=60,
+        )
+        other_booking.create_lessons()
+        self.booking.create_lessons()
+        self.booking.lesson_set.filter(pk=self.booking.lesson_set.first().pk).update(
+            edited=True
+        )
+        self.form_input["teacher"] = other_teacher
+        form = EditBookingForm(booking=self.booking, data=self.form_input)
+        self.assertTrue(form.is_valid())
+        with self.assertRaises(ValidationError):
+            form.save()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.teacher, self.teacher)
@@ -1,11 +1,11 @@
-from django.test import TestCase
 from django import forms
 from lessons.forms import EditLessonForm
 from lessons.models import SchoolTerm, Lesson, Booking, User, Teacher
 from djmoney.money import Money
 import datetime
+from lessons.tests.helpers import LessonsTestCase
 
-class EditBookingFormTestCase(TestCase):
+class EditBookingFormTestCase(LessonsTestCase):
     """Unit tests for editing lesson form"""
 
     fixtures = [
@@ -13,6 +13,7 @@ class EditBookingFormTestCase(TestCase):
         "lessons/tests/fixtures/default_teacher.json",
     ]
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(pk=2)
         self.teacher = Teacher.objects.get(pk=5)
 
@@ -115,6 +116,33 @@ class EditBookingFormTestCase(TestCase):
         )
         self.assertTrue(form.is_valid())
 
+    def test_form_rejects_time_the_teacher_is_busy(self):
+        other_booking = Booking.objects.create(
+            num_of_lessons=1,
+            user=self.user,
+            teacher=self.teacher,
+            days_between_lessons=7,
+            lesson_duration=60,
+        )
+        Lesson.objects.create(
+            name="Other lesson",
+            date=datetime.date(2022, 10, 10),
+            startTime=datetime.time(9, 30, 0),
+            booking=other_booking,
+        )
+        form = EditLessonForm(
+            lesson=self.lesson, data=self.form_input
+        )
+        self.assertFalse(form.is_valid())
+
+    def test_form_accepts_the_lessons_own_time(self):
+        self.form_input["date"] = "2022-09-10"
+        self.form_input["startTime"] = "11:00"
+        form = EditLessonForm(
+            lesson=self.lesson, data=self.form_input
+        )
+        self.assertTrue(form.is_valid())
+
     def test_form_saves_correctly(self):
         form = EditLessonForm(
             lesson=self.lesson, data=self.form_input
@@ -126,4 +154,5 @@ class EditBookingFormTestCase(TestCase):
         self.assertEqual(lesson.name,self.form_input['name'])
         self.assertEqual(lesson.date,datetime.date(2022,10,10))
         self.assertEqual(lesson.startTime,datetime.time(10,0,0))
-        self.assertEqual(lesson.description,self.form_input['description'])
\ No newline at end of file
+        self.assertEqual(lesson.description,self.form_input['description'])
+        self.assertTrue(lesson.edited)
\ No newline at end of file
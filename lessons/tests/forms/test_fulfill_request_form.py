@@ -1,15 +1,14 @@
-import datetime
-from django.test import TestCase
 from django import forms
 
 from lessons.forms import FulfillLessonRequestForm
-from lessons.models import Booking, RequestForLessons, SchoolTerm, Teacher, User
+from lessons.models import Booking, RequestForLessons, Teacher, User
+from lessons.tests.helpers import LessonsTestCase, create_test_terms
 
 
 # Create your tests here.
 
 
-class FulfillRequestFormTestCase(TestCase):
+class FulfillRequestFormTestCase(LessonsTestCase):
     """Unit tests for fulfilling the request for lessons form"""
 
     fixtures = [
@@ -19,14 +18,12 @@ class FulfillRequestFormTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.teacher = Teacher.objects.get(pk=5)
         self.request = RequestForLessons.objects.get(pk=1)
         self.user = User.objects.get(pk=2)
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
 
         self.form_input = {
             "teacher": self.teacher.pk,
@@ -93,4 +90,14 @@ class FulfillRequestFormTestCase(TestCase):
         self.assertEqual(booking.description, "This is a description")
         self.assertEqual(booking.teacher, self.teacher)
         self.assertEqual(booking.user, self.user)
+        self.assertEqual(booking.weekday_mask, self.request.weekday_mask)
+
+    def test_lessons_are_placed_on_available_days(self):
+        form = FulfillLessonRequestForm(
+            lesson_request=self.request, data=self.form_input
+        )
+        booking = form.save()
+        # the default request is available on MON,WED,SAT
+        for lesson in booking.lesson_set.all():
+            self.assertIn(lesson.date.weekday(), (0, 2, 5))
         # todo: assertEqual(booking.invoice, ??)
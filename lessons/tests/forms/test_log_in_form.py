@@ -1,12 +1,13 @@
 """Unit tests of the log in form."""
-from django.test import TestCase
 from django import forms
 from lessons.forms import LogInForm
+from lessons.tests.helpers import LessonsTestCase
 
-class LogInFormTestCase(TestCase):
+class LogInFormTestCase(LessonsTestCase):
     """Unit tests of the log in form."""
 
     def setUp(self):
+        super().setUp()
         self.form_input = {'email':'user@example.org', 'password':'Password123'}
 
     #check if login page includes username and password field
@@ -1,17 +1,18 @@
 """Unit tests of the payment form."""
 from django import forms
-from django.test import TestCase
 from lessons.forms import PaymentForm
 from lessons.models import Invoice, Student, User
 from djmoney.money import Money
+from lessons.tests.helpers import LessonsTestCase
 
-class PaymentFormTestCase(TestCase):
+class PaymentFormTestCase(LessonsTestCase):
     """Unit tests of the payment form."""
 
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
     ]
     def setUp(self):
+        super().setUp()
         self.user_student = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user_student)
 
@@ -115,4 +116,27 @@ class PaymentFormTestCase(TestCase):
     def test_form_rejects_invalid_postcode(self):
         self.form_input['postcode'] = 'WCR 2LS'
         form = PaymentForm(data=self.form_input,user=self.user_student)
-        self.assertFalse(form.is_valid())
\ No newline at end of file
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_unknown_invoice_urn(self):
+        self.form_input['invoice_urn'] = '9999-1'
+        form = PaymentForm(data=self.form_input,user=self.user_student)
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_paid_invoice(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(is_paid=True)
+        form = PaymentForm(data=self.form_input,user=self.user_student)
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_invoice_of_another_user(self):
+        other_user = User.objects.create_user(
+            "someone.else@example.org", first_name="Some", last_name="One"
+        )
+        form = PaymentForm(data=self.form_input,user=other_user)
+        self.assertFalse(form.is_valid())
+
+    def test_form_validates_invoice_urn_with_one_query(self):
+        form = PaymentForm(data=self.form_input,user=self.user_student)
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['invoice_urn'], self.invoice.urn)
@@ -1,19 +1,20 @@
 from datetime import date
 from django.db import IntegrityError
-from django.test import TestCase
 from django import forms
 
 from lessons.forms import RequestForLessonsForm, SchoolTermForm
 from lessons.models import SchoolTerm, Student, User
+from lessons.tests.helpers import LessonsTestCase
 
 
 # Create your tests here.
 
 
-class SchoolTermFormTestCase(TestCase):
+class SchoolTermFormTestCase(LessonsTestCase):
     """Unit tests for the request for lessons form"""
 
     def setUp(self):
+        super().setUp()
         self.form_input = {"start_date": "2022-10-10", "end_date": "2022-12-14"}
 
     # Form accepts valid input
@@ -1,17 +1,18 @@
-from django.test import TestCase
 from django import forms
 from django.contrib.auth.hashers import check_password
 
 from lessons.forms import StudentSignUpForm
 from lessons.models import Student, User
+from lessons.tests.helpers import LessonsTestCase
 
 # Create your tests here.
 
 
-class StudentSignUpFormTestCase(TestCase):
+class StudentSignUpFormTestCase(LessonsTestCase):
     """Unit tests for the sign up form"""
 
     def setUp(self):
+        super().setUp()
         self.form_input = {
             "first_name": "John",
             "last_name": "Doe",
@@ -1,4 +1,23 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
 from lessons.models import SchoolTerm, Booking, User, Student, Teacher, SchoolAdmin
+from lessons.scheduling import invalidate_term_index
+
+
+class LessonsTestCase(TestCase):
+    """TestCase that starts every test with an empty cache and term index
+
+    Cached rows, balances and school terms are dropped once a transaction
+    commits, which never happens inside a TestCase, so without this they
+    would leak from one test into the next."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        invalidate_term_index()
+
 
 class LogInTester:
     def is_logged_in(self):
@@ -10,6 +29,18 @@ fixtures = [
     "lessons/tests/fixtures/default_director.json",
 ]
 
+def create_test_terms():
+    """Creates the autumn 2022 term, and a spring 2023 term so the lessons
+    of every test booking fit in term time"""
+    SchoolTerm.objects.create(
+        start_date=datetime.date(2022, 9, 1),
+        end_date=datetime.date(2022, 10, 21),
+    )
+    SchoolTerm.objects.create(
+        start_date=datetime.date(2023, 2, 20),
+        end_date=datetime.date(2023, 7, 14),
+    )
+
 def create_test_bookings(booking_count):
         user = User.objects.get(email="john.doe@example.org")
         student = Student.objects.get(user=user)
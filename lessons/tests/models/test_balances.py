@@ -0,0 +1,88 @@
+from djmoney.money import Money
+from lessons.balances import outstanding_balance, school_balances
+from lessons.models import Invoice, Student, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class OutstandingBalanceTest(LessonsTestCase):
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/other_students.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.user_student = User.objects.get(email="john.doe@example.org")
+        self.invoice = Invoice.objects.create(
+            user=self.user_student, invoice_num=1, price=Money(15, "GBP")
+        )
+        Invoice.objects.create(
+            user=self.user_student, invoice_num=2, price=Money(5, "GBP"), is_paid=True
+        )
+
+    def test_balance_sums_unpaid_invoices(self):
+        self.assertEqual(
+            outstanding_balance(self.user_student),
+            {"total": Money(15, "GBP"), "count": 1},
+        )
+
+    def test_balance_without_invoices_is_zero(self):
+        other = Student.objects.exclude(user=self.user_student).first().user
+        self.assertEqual(
+            outstanding_balance(other), {"total": Money(0, "GBP"), "count": 0}
+        )
+
+    def test_balance_is_cached(self):
+        outstanding_balance(self.user_student)
+        with self.assertNumQueries(0):
+            outstanding_balance(self.user_student)
+        school_balances()
+        with self.assertNumQueries(0):
+            school_balances()
+
+    def test_new_invoice_drops_cached_balance(self):
+        outstanding_balance(self.user_student)
+        school_balances()
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.create(
+                user=self.user_student, invoice_num=3, price=Money(10, "GBP")
+            )
+        self.assertEqual(outstanding_balance(self.user_student)["count"], 2)
+        self.assertEqual(school_balances()[0]["total"], Money(25, "GBP"))
+
+    def test_paying_an_invoice_drops_cached_balance(self):
+        outstanding_balance(self.user_student)
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.mark_paid(self.invoice.urn, self.user_student)
+        self.assertEqual(
+            outstanding_balance(self.user_student),
+            {"total": Money(0, "GBP"), "count": 0},
+        )
+
+    def test_cached_balance_is_kept_until_commit(self):
+        outstanding_balance(self.user_student)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Invoice.objects.mark_paid(self.invoice.urn, self.user_student)
+        self.assertEqual(outstanding_balance(self.user_student)["count"], 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(outstanding_balance(self.user_student)["count"], 0)
+
+    def test_school_balances_group_by_school(self):
+        other = Student.objects.exclude(user=self.user_student).first()
+        Invoice.objects.create(user=other.user, invoice_num=1, price=Money(7, "GBP"))
+        self.assertEqual(
+            school_balances(),
+            [
+                {
+                    "school_name": "King's College London",
+                    "total": Money(15, "GBP"),
+                    "count": 1,
+                },
+                {
+                    "school_name": "University College London",
+                    "total": Money(7, "GBP"),
+                    "count": 1,
+                },
+            ],
+        )
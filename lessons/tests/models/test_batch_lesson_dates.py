@@ -0,0 +1,96 @@
+from django.core.exceptions import ValidationError
+from lessons.models import Booking
+from lessons.scheduling import SchoolTermIndex, batch_lesson_dates, lesson_dates
+import datetime
+import random
+from lessons.tests.helpers import LessonsTestCase
+
+
+class BatchLessonDatesTest(LessonsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = SchoolTermIndex(
+            [
+                (datetime.date(2022, 9, 1), datetime.date(2022, 10, 21)),
+                (datetime.date(2022, 10, 31), datetime.date(2022, 12, 16)),
+                (datetime.date(2023, 1, 3), datetime.date(2023, 2, 10)),
+                # long enough for every random booking below to fit
+                (datetime.date(2023, 2, 20), datetime.date(2024, 12, 20)),
+            ]
+        )
+
+    def _assert_same_as_lesson_dates(self, start_dates, steps, counts, masks, index):
+        booking_indices, dates = batch_lesson_dates(
+            start_dates, steps, counts, masks, index
+        )
+        expected = [
+            lesson_dates(start_date, step, count, index, mask)
+            for start_date, step, count, mask in zip(start_dates, steps, counts, masks)
+        ]
+        self.assertEqual(
+            list(zip(booking_indices.tolist(), dates.tolist())),
+            [
+                (i, date)
+                for i, booking_dates in enumerate(expected)
+                for date in booking_dates
+            ],
+        )
+
+    def test_dates_match_lesson_dates(self):
+        rng = random.Random(0)
+        count = 300
+        self._assert_same_as_lesson_dates(
+            [
+                datetime.date(2022, 8, 1) + datetime.timedelta(days=rng.randrange(200))
+                for _ in range(count)
+            ],
+            [rng.randrange(1, 14) for _ in range(count)],
+            [rng.randrange(0, 40) for _ in range(count)],
+            [rng.randrange(0, 128) for _ in range(count)],
+            self.index,
+        )
+
+    def test_dates_match_lesson_dates_without_terms(self):
+        self._assert_same_as_lesson_dates(
+            [datetime.date(2022, 9, 1), datetime.date(2022, 9, 5)],
+            [7, 3],
+            [5, 4],
+            [0b0000100, 0],
+            SchoolTermIndex([]),
+        )
+
+    def test_not_enough_term_time_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            batch_lesson_dates(
+                [datetime.date(2022, 9, 1), datetime.date(2024, 11, 1)],
+                [7, 7],
+                [3, 10],
+                [0, 0],
+                self.index,
+            )
+
+    def test_finished_bookings_may_step_past_the_last_term(self):
+        # the short booking keeps stepping while the long one is scheduled
+        booking_indices, dates = batch_lesson_dates(
+            [datetime.date(2024, 12, 1), datetime.date(2024, 9, 2)],
+            [30, 7],
+            [1, 10],
+            [0, 0],
+            self.index,
+        )
+        self.assertEqual(booking_indices.tolist(), [0] + [1] * 10)
+
+    def test_no_bookings_gives_no_dates(self):
+        booking_indices, dates = batch_lesson_dates([], [], [], [], self.index)
+        self.assertEqual(len(booking_indices), 0)
+        self.assertEqual(len(dates), 0)
+
+    def test_lesson_schedules_match_lesson_schedule(self):
+        bookings = [
+            Booking(days_between_lessons=7, num_of_lessons=10, weekday_mask=0b0000010),
+            Booking(days_between_lessons=3, num_of_lessons=6, weekday_mask=0b1100000),
+        ]
+        self.assertEqual(
+            Booking.lesson_schedules(bookings, self.index),
+            [booking.lesson_schedule(self.index) for booking in bookings],
+        )
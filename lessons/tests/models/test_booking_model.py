@@ -1,18 +1,19 @@
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import override_settings
 from lessons.models import SchoolTerm, Booking, Invoice, User, Student, Teacher
 from djmoney.money import Money
 import datetime
+from lessons.tests.helpers import LessonsTestCase, create_test_terms
 
 
-class BookingTest(TestCase):
+class BookingTest(LessonsTestCase):
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
         "lessons/tests/fixtures/default_teacher.json",
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.user_student = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user_student)
 
@@ -47,10 +48,7 @@ class BookingTest(TestCase):
         )
         self.booking_other.save()
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
 
     def test_valid_booking(self):
         self._assert_booking_is_valid()
@@ -79,6 +77,14 @@ class BookingTest(TestCase):
         self.booking.lesson_duration = None
         self._assert_booking_is_invalid()
 
+    def test_weekday_mask_must_not_be_empty(self):
+        self.booking.weekday_mask = 0
+        self._assert_booking_is_invalid()
+
+    def test_weekday_mask_must_fit_in_a_week(self):
+        self.booking.weekday_mask = 0b10000000
+        self._assert_booking_is_invalid()
+
     def test_invoice_field_must_not_be_blank(self):
         self.booking.invoice = None
         self._assert_booking_is_invalid()
@@ -130,6 +136,18 @@ class BookingTest(TestCase):
             self.booking.lesson_duration * self.booking.num_of_lessons / 10, "GBP"
         )
         self.assertEqual(self.booking.invoice.price, costOfBooking)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.price, costOfBooking)
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.25")
+    def test_price_uses_the_tariff(self):
+        self.assertEqual(self.booking.calculate_price(), Money("150.00", "GBP"))
+
+    @override_settings(LESSON_TARIFF_PER_MINUTE="0.125")
+    def test_price_rounds_half_pennies_up(self):
+        self.booking.num_of_lessons = 1
+        self.booking.lesson_duration = 45
+        self.assertEqual(self.booking.calculate_price(), Money("5.63", "GBP"))
 
     def test_create_lessons_for_booking(self):
         self.booking.create_lessons()
@@ -138,6 +156,45 @@ class BookingTest(TestCase):
         daysBetweenLesson = lessons[1].date - lessons[0].date
         self.assertTrue(daysBetweenLesson<=datetime.timedelta(self.booking.days_between_lessons))
 
+    def test_create_lessons_uses_a_single_insert(self):
+        self.booking.teacher = Teacher.objects.select_related("user").get(pk=self.teacher.pk)
+        # school terms, the teacher's timetable, one batched insert
+        with self.assertNumQueries(3):
+            self.booking.create_lessons()
+        self.assertEqual(self.booking.lesson_set.count(), self.booking.num_of_lessons)
+
+    def test_create_lessons_respects_batch_size(self):
+        self.booking.teacher = Teacher.objects.select_related("user").get(pk=self.teacher.pk)
+        # 10 lessons in batches of 4 need 3 inserts
+        with self.assertNumQueries(5):
+            self.booking.create_lessons(batch_size=4)
+        self.assertEqual(self.booking.lesson_set.count(), self.booking.num_of_lessons)
+
+    def test_create_lessons_skips_holidays(self):
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2023, 1, 3),
+            end_date=datetime.date(2023, 2, 10),
+        )
+        self.booking.create_lessons()
+        for lesson in self.booking.lesson_set.all():
+            self.assertFalse(
+                datetime.date(2022, 10, 21) < lesson.date < datetime.date(2023, 1, 3)
+            )
+        self.assertTrue(
+            self.booking.lesson_set.filter(date=datetime.date(2023, 1, 3)).exists()
+        )
+
+    def test_create_lessons_needs_enough_term_time(self):
+        self.booking.num_of_lessons = 60
+        with self.assertRaises(ValidationError):
+            self.booking.create_lessons()
+        self.assertFalse(self.booking.lesson_set.exists())
+
+    def test_create_lessons_without_school_terms(self):
+        SchoolTerm.objects.all().delete()
+        with self.assertRaises(ValidationError):
+            self.booking.create_lessons()
+
     def test_update_lessons_for_booking(self):
         self.booking.days_between_lessons = 10
         self.booking.update_lessons()
@@ -146,6 +203,159 @@ class BookingTest(TestCase):
         daysBetweenLesson = lessons[1].date - lessons[0].date
         self.assertTrue(daysBetweenLesson<=datetime.timedelta(self.booking.days_between_lessons))
 
+    def test_update_lessons_keeps_lesson_ids(self):
+        self.booking.create_lessons()
+        lesson_ids = list(self.booking.lesson_set.order_by("id").values_list("id", flat=True))
+        self.booking.days_between_lessons = 3
+        self.booking.update_lessons()
+        lessons = self.booking.lesson_set.order_by("id")
+        self.assertEqual(list(lessons.values_list("id", flat=True)), lesson_ids)
+        self.assertEqual(lessons[1].date - lessons[0].date, datetime.timedelta(3))
+
+    def test_update_lessons_with_new_description_is_a_single_update(self):
+        self.booking.create_lessons()
+        self.booking.description = "Piano lesson"
+        # savepoint, lessons, timetable, one batched update, release
+        # (the school terms are already cached by create_lessons)
+        with self.assertNumQueries(5):
+            self.booking.update_lessons()
+        self.assertEqual(
+            self.booking.lesson_set.filter(description="Piano lesson").count(),
+            self.booking.num_of_lessons,
+        )
+
+    def test_update_lessons_without_changes_does_not_write(self):
+        self.booking.create_lessons()
+        # savepoint, lessons, timetable, release
+        with self.assertNumQueries(4):
+            self.booking.update_lessons()
+
+    def test_update_lessons_adds_and_removes_lessons(self):
+        self.booking.create_lessons()
+        self.booking.num_of_lessons = 12
+        self.booking.update_lessons()
+        self.assertEqual(self.booking.lesson_set.count(), 12)
+        first_ids = list(self.booking.lesson_set.order_by("id").values_list("id", flat=True))[:4]
+        self.booking.num_of_lessons = 4
+        self.booking.update_lessons()
+        self.assertEqual(
+            list(self.booking.lesson_set.order_by("id").values_list("id", flat=True)),
+            first_ids,
+        )
+
+    def test_update_lessons_preserves_edited_lessons(self):
+        self.booking.create_lessons()
+        edited = self.booking.lesson_set.order_by("id")[2]
+        edited.date = datetime.date(2022, 10, 20)
+        edited.startTime = datetime.time(17, 30)
+        edited.edited = True
+        edited.save()
+        self.booking.days_between_lessons = 2
+        self.booking.description = "Piano lesson"
+        self.booking.update_lessons()
+        edited.refresh_from_db()
+        self.assertEqual(edited.date, datetime.date(2022, 10, 20))
+        self.assertEqual(edited.startTime, datetime.time(17, 30))
+        self.assertEqual(edited.description, "Gutitar lesson on basics")
+
+    def test_lessons_of_a_teacher_do_not_overlap(self):
+        self.booking.create_lessons()
+        self.booking_other.create_lessons()
+        for lesson in self.booking.lesson_set.all():
+            other = self.booking_other.lesson_set.get(date=lesson.date)
+            self.assertEqual(lesson.startTime, datetime.time(9, 0))
+            self.assertEqual(other.startTime, datetime.time(10, 0))
+
+    def test_create_lessons_rejects_a_fully_booked_day(self):
+        self.booking.lesson_duration = 9 * 60
+        self.booking.save()
+        self.booking.create_lessons()
+        with self.assertRaises(ValidationError):
+            self.booking_other.create_lessons()
+
+    def test_update_lessons_avoids_the_teachers_other_lessons(self):
+        self.booking.create_lessons()
+        self.booking_other.create_lessons()
+        self.booking.days_between_lessons = 8
+        self.booking.update_lessons()
+        self.booking_other.days_between_lessons = 8
+        self.booking_other.update_lessons()
+        for lesson in self.booking_other.lesson_set.all():
+            self.assertEqual(lesson.startTime, datetime.time(10, 0))
+
+    def test_update_lessons_keeps_the_time_of_each_lesson(self):
+        # the other booking only clashes with the first lesson
+        self.booking.num_of_lessons = 1
+        self.booking.save()
+        self.booking.create_lessons()
+        self.booking_other.create_lessons()
+        times = list(
+            self.booking_other.lesson_set.order_by("id").values_list(
+                "startTime", flat=True
+            )
+        )
+        self.assertEqual(times[0], datetime.time(10, 0))
+        self.assertEqual(set(times[1:]), {datetime.time(9, 0)})
+        self.booking_other.description = "Piano lesson"
+        self.booking_other.update_lessons()
+        self.assertEqual(
+            list(
+                self.booking_other.lesson_set.order_by("id").values_list(
+                    "startTime", flat=True
+                )
+            ),
+            times,
+        )
+
+    def test_update_lessons_rejects_an_edited_lesson_clashing_with_a_new_teacher(self):
+        new_teacher = self._create_other_teacher()
+        self.booking_other.teacher = new_teacher
+        self.booking_other.save()
+        self.booking_other.create_lessons()
+        self.booking.create_lessons()
+        edited = self.booking.lesson_set.order_by("id")[2]
+        edited.edited = True
+        edited.save()
+        self.booking.teacher = new_teacher
+        self.booking.save()
+        with self.assertRaises(ValidationError):
+            self.booking.update_lessons()
+
+    def test_update_lessons_keeps_an_edited_lesson_free_for_a_new_teacher(self):
+        new_teacher = self._create_other_teacher()
+        self.booking_other.teacher = new_teacher
+        self.booking_other.save()
+        self.booking_other.create_lessons()
+        self.booking.create_lessons()
+        edited = self.booking.lesson_set.order_by("id")[2]
+        edited.startTime = datetime.time(17, 30)
+        edited.edited = True
+        edited.save()
+        self.booking.teacher = new_teacher
+        self.booking.save()
+        self.booking.update_lessons()
+        edited.refresh_from_db()
+        self.assertEqual(edited.startTime, datetime.time(17, 30))
+        self.assertEqual(
+            set(
+                self.booking.lesson_set.filter(edited=False).values_list(
+                    "startTime", flat=True
+                )
+            ),
+            {datetime.time(10, 0)},
+        )
+
+    def _create_other_teacher(self):
+        user = User.objects.create_user(
+            "other.teacher@example.org",
+            first_name="Other",
+            last_name="Teacher",
+            password="TestPassword123",
+        )
+        user.is_teacher = True
+        user.save()
+        return Teacher.objects.create(user=user, school_name="Test School")
+
     def _assert_booking_is_invalid(self):
         with self.assertRaises(ValidationError):
             self.booking.full_clean()
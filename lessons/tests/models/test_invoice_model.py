@@ -1,16 +1,16 @@
 from django.core.exceptions import ValidationError
-from django.test import TestCase
 from lessons.models import Invoice, Student, User
 from djmoney.money import Money
+from lessons.tests.helpers import LessonsTestCase
 
 
-class InvoiceTest(TestCase):
+class InvoiceTest(LessonsTestCase):
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.user_student = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user_student)
 
@@ -80,6 +80,30 @@ class InvoiceTest(TestCase):
         self.invoice.price = Money(999999, "GBP")
         self._assert_invoice_is_invalid()
 
+    def test_urn_must_be_unique(self):
+        self.second_invoice.urn = self.invoice.urn
+        with self.assertRaises(ValidationError):
+            self.second_invoice.validate_unique()
+
+    def test_mark_paid_pays_unpaid_invoice(self):
+        self.assertTrue(Invoice.objects.mark_paid(self.invoice.urn, self.user_student))
+        self.invoice.refresh_from_db()
+        self.assertTrue(self.invoice.is_paid)
+
+    def test_mark_paid_is_a_no_op_when_already_paid(self):
+        Invoice.objects.mark_paid(self.invoice.urn, self.user_student)
+        with self.assertNumQueries(1):
+            paid = Invoice.objects.mark_paid(self.invoice.urn, self.user_student)
+        self.assertFalse(paid)
+
+    def test_mark_paid_only_pays_the_users_own_invoices(self):
+        other_user = User.objects.create_user(
+            "someone.else@example.org", first_name="Some", last_name="One"
+        )
+        self.assertFalse(Invoice.objects.mark_paid(self.invoice.urn, other_user))
+        self.invoice.refresh_from_db()
+        self.assertFalse(self.invoice.is_paid)
+
     def _assert_invoice_is_invalid(self):
         with self.assertRaises(ValidationError):
             self.invoice.full_clean()
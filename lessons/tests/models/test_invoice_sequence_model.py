@@ -0,0 +1,55 @@
+from lessons.models import Booking, Invoice, InvoiceSequence, Teacher, User
+from djmoney.money import Money
+from lessons.tests.helpers import LessonsTestCase
+
+
+class InvoiceSequenceTest(LessonsTestCase):
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.user_student = User.objects.get(email="john.doe@example.org")
+        self.teacher = Teacher.objects.get(user__email="jane.doe@example.org")
+
+    def _booking(self):
+        return Booking(
+            num_of_lessons=4,
+            user=self.user_student,
+            teacher=self.teacher,
+            days_between_lessons=7,
+            lesson_duration=30,
+        )
+
+    def test_new_sequence_carries_on_from_existing_invoices(self):
+        Invoice.objects.create(
+            user=self.user_student, invoice_num=3, price=Money(10, "GBP")
+        )
+        first_nums = InvoiceSequence.reserve({self.user_student.id: 1})
+        self.assertEqual(first_nums, {self.user_student.id: 4})
+
+    def test_reserving_a_block_hands_out_consecutive_numbers(self):
+        user_id = self.user_student.id
+        self.assertEqual(InvoiceSequence.reserve({user_id: 5}), {user_id: 1})
+        self.assertEqual(InvoiceSequence.reserve({user_id: 1}), {user_id: 6})
+        self.assertEqual(
+            InvoiceSequence.objects.get(user=self.user_student).last_invoice_num, 6
+        )
+
+    def test_create_invoice_numbers_invoices_in_order(self):
+        first, second = self._booking(), self._booking()
+        first.create_invoice()
+        second.create_invoice()
+        self.assertEqual(first.invoice.invoice_num, 1)
+        self.assertEqual(second.invoice.invoice_num, 2)
+        self.assertEqual(second.invoice.urn, f"{self.user_student.id + 1000}-2")
+
+    def test_deleted_invoices_do_not_free_their_numbers(self):
+        booking = self._booking()
+        booking.create_invoice()
+        booking.invoice.delete()
+        other = self._booking()
+        other.create_invoice()
+        self.assertEqual(other.invoice.invoice_num, 2)
@@ -1,17 +1,17 @@
 from django.core.exceptions import ValidationError
-from django.test import TestCase
 from lessons.models import SchoolTerm, Booking, Lesson, User, Student, Teacher
 from djmoney.money import Money
 import datetime
 from datetime import timedelta
+from lessons.tests.helpers import LessonsTestCase
 
-class LessonTest(TestCase):
+class LessonTest(LessonsTestCase):
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
         "lessons/tests/fixtures/default_teacher.json",
     ]
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.user_student = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user_student)
 
@@ -82,6 +82,18 @@ class LessonTest(TestCase):
         except ValidationError:
             self.fail("Test lesson should be valids")
 
+    def test_lesson_may_be_on_the_first_or_last_day_of_a_term(self):
+        for date in (datetime.date(2022, 9, 1), datetime.date(2022, 10, 21)):
+            self.lesson.date = date
+            try:
+                self.lesson.full_clean()
+            except ValidationError:
+                self.fail("Test lesson should be valid")
+
+    def test_lesson_must_lie_in_a_term(self):
+        self.lesson.date = datetime.date(2022, 10, 22)
+        self._assert_lesson_is_invalid()
+
     def _assert_lesson_is_invalid(self):
         with self.assertRaises(ValidationError):
             self.lesson.full_clean()
\ No newline at end of file
@@ -0,0 +1,84 @@
+from lessons.fulfillment import propose_assignments, teacher_loads
+from lessons.models import Booking, RequestForLessons, Student, Teacher, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class ProposeAssignmentsTest(LessonsTestCase):
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.student = Student.objects.get(user__email="john.doe@example.org")
+        self.teacher = Teacher.objects.get(user__email="jane.doe@example.org")
+        self.teacher.school_name = self.student.school_name
+        self.teacher.save()
+        other_user = User.objects.create_user(
+            "other.teacher@example.org",
+            first_name="Other",
+            last_name="Teacher",
+            password="Watermelon123",
+        )
+        self.other_teacher = Teacher.objects.create(
+            user=other_user, school_name=self.student.school_name
+        )
+
+    def _create_requests(self, count, lesson_duration=60):
+        return [
+            RequestForLessons.objects.create(
+                user=self.student.user,
+                availability="MON",
+                lesson_duration=lesson_duration,
+                days_between_lessons=7,
+            )
+            for _ in range(count)
+        ]
+
+    def test_teacher_loads_are_weekly_minutes(self):
+        Booking.objects.create(
+            num_of_lessons=5,
+            user=self.student.user,
+            teacher=self.teacher,
+            days_between_lessons=14,
+            lesson_duration=60,
+        )
+        self.assertEqual(teacher_loads(), {self.teacher.pk: 30})
+
+    def test_requests_are_spread_over_teachers(self):
+        requests = self._create_requests(4)
+        proposal = propose_assignments()
+        self.assertEqual(set(proposal), {request.id for request in requests})
+        assigned = list(proposal.values())
+        self.assertEqual(assigned.count(self.teacher.pk), 2)
+        self.assertEqual(assigned.count(self.other_teacher.pk), 2)
+
+    def test_existing_load_is_taken_into_account(self):
+        Booking.objects.create(
+            num_of_lessons=5,
+            user=self.student.user,
+            teacher=self.teacher,
+            days_between_lessons=7,
+            lesson_duration=120,
+        )
+        requests = self._create_requests(2)
+        proposal = propose_assignments()
+        for request in requests:
+            self.assertEqual(proposal[request.id], self.other_teacher.pk)
+
+    def test_teachers_from_the_same_school_are_preferred(self):
+        self.other_teacher.school_name = "Another School"
+        self.other_teacher.save()
+        request = self._create_requests(1)[0]
+        self.assertEqual(propose_assignments()[request.id], self.teacher.pk)
+
+    def test_fulfilled_requests_are_not_proposed(self):
+        request = self._create_requests(1)[0]
+        request.fulfilled = True
+        request.save()
+        self.assertEqual(propose_assignments(), {})
+
+    def test_no_teachers(self):
+        self._create_requests(1)
+        self.assertEqual(propose_assignments(teachers=[]), {})
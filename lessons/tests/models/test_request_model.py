@@ -1,16 +1,17 @@
 from django.core.validators import ValidationError
-from django.test import TestCase
 
 from lessons.models import RequestForLessons, Student, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class RequestModelTestCase(TestCase):
+class RequestModelTestCase(LessonsTestCase):
     fixtures = [
         "lessons/tests/fixtures/default_user.json",
         "lessons/tests/fixtures/default_request.json",
     ]
 
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(email="default.user@example.org")
         self.request = self.user.requestforlessons_set.first()
 
@@ -75,6 +76,10 @@ class RequestModelTestCase(TestCase):
         self.request.other_info = "x" * 500
         self._assert_request_is_valid()
 
+    def test_weekday_mask_matches_availability(self):
+        # the default request is available on MON,WED,SAT
+        self.assertEqual(self.request.weekday_mask, 0b0100101)
+
     def _assert_request_is_valid(self):
         try:
             self.request.full_clean()
@@ -0,0 +1,39 @@
+from lessons.row_cache import invalidate_rows, row_versions, set_row_versions
+from lessons.tests.helpers import LessonsTestCase
+
+
+class RowCacheTest(LessonsTestCase):
+    def test_row_versions_are_stable(self):
+        first = row_versions("booking", [1, 2])
+        self.assertEqual(row_versions("booking", [1, 2]), first)
+        self.assertNotEqual(first[1], first[2])
+
+    def test_invalidate_rows_changes_only_their_versions(self):
+        before = row_versions("booking", [1, 2])
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_rows("booking", [1])
+        after = row_versions("booking", [1, 2])
+        self.assertNotEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+
+    def test_versions_are_kept_per_name(self):
+        bookings = row_versions("booking", [1])
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_rows("lesson", [1])
+        self.assertEqual(row_versions("booking", [1]), bookings)
+
+    def test_invalidate_rows_waits_for_the_commit(self):
+        before = row_versions("booking", [1])
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_rows("booking", [1])
+        self.assertEqual(row_versions("booking", [1]), before)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_set_row_versions(self):
+        class Row:
+            def __init__(self, pk):
+                self.pk = pk
+
+        rows = set_row_versions([Row(1), Row(2)], "lesson")
+        versions = row_versions("lesson", [1, 2])
+        self.assertEqual([row.row_version for row in rows], [versions[1], versions[2]])
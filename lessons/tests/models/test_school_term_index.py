@@ -0,0 +1,181 @@
+from django.core.exceptions import ValidationError
+from lessons.models import Lesson, SchoolTerm
+from lessons.scheduling import (
+    ALL_WEEKDAYS,
+    SchoolTermIndex,
+    availability_to_mask,
+    get_term_index,
+    lesson_dates,
+)
+import datetime
+from lessons.tests.helpers import LessonsTestCase
+
+
+class SchoolTermIndexTest(LessonsTestCase):
+    def setUp(self):
+        super().setUp()
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2023, 1, 3),
+            end_date=datetime.date(2023, 2, 10),
+        )
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2022, 9, 1),
+            end_date=datetime.date(2022, 10, 21),
+        )
+        self.index = SchoolTermIndex.load()
+
+    def test_index_is_loaded_with_one_query(self):
+        with self.assertNumQueries(1):
+            SchoolTermIndex.load()
+
+    def test_terms_are_sorted_by_start_date(self):
+        self.assertEqual(
+            self.index.start_dates,
+            [datetime.date(2022, 9, 1), datetime.date(2023, 1, 3)],
+        )
+        self.assertEqual(self.index.first_start_date(), datetime.date(2022, 9, 1))
+
+    def test_term_bounds_are_inside_the_term(self):
+        self.assertTrue(self.index.contains(datetime.date(2022, 9, 1)))
+        self.assertTrue(self.index.contains(datetime.date(2022, 10, 21)))
+        self.assertTrue(self.index.contains(datetime.date(2023, 2, 10)))
+
+    def test_holiday_dates_are_not_inside_a_term(self):
+        self.assertFalse(self.index.contains(datetime.date(2022, 8, 31)))
+        self.assertFalse(self.index.contains(datetime.date(2022, 12, 1)))
+        self.assertFalse(self.index.contains(datetime.date(2023, 2, 11)))
+
+    def test_next_term_date_keeps_term_dates(self):
+        date = datetime.date(2022, 10, 3)
+        self.assertEqual(self.index.next_term_date(date), date)
+
+    def test_next_term_date_skips_holidays(self):
+        self.assertEqual(
+            self.index.next_term_date(datetime.date(2022, 11, 14)),
+            datetime.date(2023, 1, 3),
+        )
+        self.assertEqual(
+            self.index.next_term_date(datetime.date(2022, 1, 1)),
+            datetime.date(2022, 9, 1),
+        )
+
+    def test_next_term_date_after_last_term_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.index.next_term_date(datetime.date(2023, 3, 1))
+
+    def test_lesson_dates_need_enough_term_time(self):
+        with self.assertRaises(ValidationError):
+            lesson_dates(datetime.date(2023, 1, 30), 7, 3, self.index)
+
+    def test_lesson_dates_skip_holidays(self):
+        dates = lesson_dates(datetime.date(2022, 10, 14), 7, 3, self.index)
+        self.assertEqual(
+            dates,
+            [
+                datetime.date(2022, 10, 14),
+                datetime.date(2022, 10, 21),
+                datetime.date(2023, 1, 3),
+            ],
+        )
+
+    def test_lesson_dates_only_use_available_weekdays(self):
+        # 2022-09-05 is a monday
+        mask = availability_to_mask("WED,SAT")
+        dates = lesson_dates(datetime.date(2022, 9, 5), 7, 4, self.index, mask)
+        self.assertEqual(
+            dates,
+            [
+                datetime.date(2022, 9, 7),
+                datetime.date(2022, 9, 14),
+                datetime.date(2022, 9, 21),
+                datetime.date(2022, 9, 28),
+            ],
+        )
+
+    def test_lesson_dates_skip_holidays_and_unavailable_days(self):
+        # 2023-01-03 is a tuesday
+        mask = availability_to_mask("THU")
+        dates = lesson_dates(datetime.date(2022, 10, 21), 7, 2, self.index, mask)
+        self.assertEqual(
+            dates, [datetime.date(2023, 1, 5), datetime.date(2023, 1, 12)]
+        )
+
+    def test_lesson_dates_without_availability_use_every_day(self):
+        dates = lesson_dates(datetime.date(2022, 9, 5), 1, 3, self.index, 0)
+        self.assertEqual(
+            dates,
+            [
+                datetime.date(2022, 9, 5),
+                datetime.date(2022, 9, 6),
+                datetime.date(2022, 9, 7),
+            ],
+        )
+
+    def test_availability_to_mask(self):
+        self.assertEqual(availability_to_mask("MON"), 0b0000001)
+        self.assertEqual(availability_to_mask("TUE,SAT,SUN"), 0b1100010)
+        self.assertEqual(
+            availability_to_mask("MON,TUE,WED,THU,FRI,SAT,SUN"), ALL_WEEKDAYS
+        )
+        self.assertEqual(availability_to_mask(""), 0)
+
+    def test_empty_index(self):
+        index = SchoolTermIndex([])
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.first_start_date())
+        self.assertFalse(index.contains(datetime.date(2022, 9, 1)))
+
+
+class CachedSchoolTermIndexTest(LessonsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.term = SchoolTerm.objects.create(
+            start_date=datetime.date(2022, 9, 1),
+            end_date=datetime.date(2022, 10, 21),
+        )
+
+    def test_cached_index_needs_no_queries(self):
+        get_term_index()
+        with self.assertNumQueries(0):
+            index = get_term_index()
+        self.assertTrue(index.contains(datetime.date(2022, 9, 1)))
+
+    def test_index_is_reloaded_after_a_term_is_saved(self):
+        get_term_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            SchoolTerm.objects.create(
+                start_date=datetime.date(2023, 1, 3),
+                end_date=datetime.date(2023, 2, 10),
+            )
+        self.assertTrue(get_term_index().contains(datetime.date(2023, 1, 3)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.term.end_date = datetime.date(2022, 10, 28)
+            self.term.save()
+        self.assertTrue(get_term_index().contains(datetime.date(2022, 10, 28)))
+
+    def test_index_is_reloaded_after_a_term_is_deleted(self):
+        get_term_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.term.delete()
+        self.assertEqual(len(get_term_index()), 0)
+
+    def test_index_is_kept_until_commit(self):
+        get_term_index()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.term.delete()
+        self.assertEqual(len(get_term_index()), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(get_term_index()), 0)
+
+    def test_index_expires(self):
+        get_term_index()
+        with self.settings(SCHOOL_TERM_CACHE_TIMEOUT=-1):
+            with self.assertNumQueries(1):
+                get_term_index()
+
+    def test_lesson_validation_uses_the_cached_index(self):
+        get_term_index()
+        lesson = Lesson(date=datetime.date(2022, 10, 21))
+        with self.assertNumQueries(0):
+            lesson.clean()
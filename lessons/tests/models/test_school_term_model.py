@@ -1,13 +1,15 @@
 from datetime import timedelta
 from django.core.validators import ValidationError
-from django.test import TestCase
+from django.db import IntegrityError
 from django.utils import timezone
 
 from lessons.models import SchoolTerm
+from lessons.tests.helpers import LessonsTestCase
 
 
-class SchoolTermTestCase(TestCase):
+class SchoolTermTestCase(LessonsTestCase):
     def setUp(self):
+        super().setUp()
         self.term = SchoolTerm.objects.create(
             start_date=timezone.now(), end_date=timezone.now() + timedelta(days=90)
         )
@@ -29,9 +31,25 @@ class SchoolTermTestCase(TestCase):
             start_date=timezone.now() + timedelta(days=120),
             end_date=timezone.now() + timedelta(days=120) + timedelta(days=90),
         )
-        self.term.start_time = other_term.start_date + timedelta(days=30)
+        self.term.start_date = other_term.start_date + timedelta(days=30)
+        self.term.end_date = other_term.start_date + timedelta(days=60)
         self._assert_term_is_invalid()
 
+    def test_term_does_not_overlap_itself(self):
+        self.term.end_date = self.term.end_date + timedelta(days=10)
+        self._assert_term_is_valid()
+
+    def test_overlap_check_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            self.term.clean()
+
+    def test_database_rejects_start_date_after_end_date(self):
+        with self.assertRaises(IntegrityError):
+            SchoolTerm.objects.create(
+                start_date=timezone.now() + timedelta(days=400),
+                end_date=timezone.now() + timedelta(days=300),
+            )
+
     def _assert_term_is_valid(self):
         try:
             self.term.full_clean()
@@ -1,18 +1,19 @@
 """Unit tests of the SchoolAdmin model"""
-from django.test import TestCase
 from lessons.models import SchoolAdmin, User
 from django.core.exceptions import ValidationError
+from lessons.tests.helpers import LessonsTestCase
 
 # Create your tests here.
 
 
-class SchoolAdminModelTestCase(TestCase):
+class SchoolAdminModelTestCase(LessonsTestCase):
     """Unit tests of the SchoolAdmin model"""
     fixtures = [
         "lessons/tests/fixtures/default_director.json",
     ]
 
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(email="bob.dylan@example.org")
         self.schooladmin = SchoolAdmin.objects.get(
             user=self.user,
@@ -1,17 +1,18 @@
-from django.test import TestCase
 from lessons.models import Student, User
 from django.core.exceptions import ValidationError
+from lessons.tests.helpers import LessonsTestCase
 
 # Create your tests here.
 
 
-class StudentModelTestCase(TestCase):
+class StudentModelTestCase(LessonsTestCase):
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
         "lessons/tests/fixtures/other_students.json",
     ]
 
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user)
 
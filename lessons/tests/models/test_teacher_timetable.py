@@ -0,0 +1,72 @@
+from lessons.models import SchoolTerm, Booking, Lesson, User, Teacher
+from lessons.scheduling import TeacherTimetable, LAST_LESSON_END
+import datetime
+from lessons.tests.helpers import LessonsTestCase
+
+
+class TeacherTimetableTest(LessonsTestCase):
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.date = datetime.date(2022, 9, 12)
+        self.timetable = TeacherTimetable()
+        self.timetable.add(1, self.date, 9 * 60, 60)
+        self.timetable.add(1, self.date, 11 * 60, 30)
+
+    def test_free_time_does_not_conflict(self):
+        self.assertFalse(self.timetable.conflicts(1, self.date, 10 * 60, 60))
+        self.assertFalse(self.timetable.conflicts(1, self.date, 11 * 60 + 30, 60))
+
+    def test_overlapping_time_conflicts(self):
+        self.assertTrue(self.timetable.conflicts(1, self.date, 9 * 60 + 30, 60))
+        self.assertTrue(self.timetable.conflicts(1, self.date, 10 * 60 + 30, 60))
+        self.assertTrue(self.timetable.conflicts(1, self.date, 8 * 60, 4 * 60))
+
+    def test_other_teachers_and_days_do_not_conflict(self):
+        self.assertFalse(self.timetable.conflicts(2, self.date, 9 * 60, 60))
+        self.assertFalse(
+            self.timetable.conflicts(1, self.date + datetime.timedelta(1), 9 * 60, 60)
+        )
+
+    def test_overlapping_lessons_are_merged(self):
+        self.timetable.add(1, self.date, 9 * 60 + 30, 120)
+        self.assertEqual(
+            self.timetable._intervals[(1, self.date)], [(9 * 60, 11 * 60 + 30)]
+        )
+
+    def test_next_free_start_skips_booked_time(self):
+        self.assertEqual(
+            self.timetable.next_free_start(1, self.date, 9 * 60, 60), 10 * 60
+        )
+        self.assertEqual(
+            self.timetable.next_free_start(1, self.date, 9 * 60, 90), 11 * 60 + 30
+        )
+
+    def test_next_free_start_on_a_full_day(self):
+        self.timetable.add(1, self.date, 10 * 60, LAST_LESSON_END - 10 * 60)
+        self.assertIsNone(self.timetable.next_free_start(1, self.date, 9 * 60, 60))
+
+    def test_timetable_is_loaded_from_lessons(self):
+        student = User.objects.get(email="john.doe@example.org")
+        teacher = Teacher.objects.get(user__email="jane.doe@example.org")
+        booking = Booking.objects.create(
+            num_of_lessons=1, user=student, teacher=teacher, lesson_duration=45
+        )
+        lesson = Lesson.objects.create(
+            name="Lesson",
+            date=self.date,
+            startTime=datetime.time(14, 0),
+            booking=booking,
+        )
+        timetable = TeacherTimetable.load([teacher.pk], self.date, self.date)
+        self.assertTrue(timetable.conflicts(teacher.pk, self.date, 14 * 60 + 30, 30))
+        self.assertFalse(timetable.conflicts(teacher.pk, self.date, 14 * 60 + 45, 30))
+
+        timetable = TeacherTimetable.load(
+            [teacher.pk], self.date, self.date, exclude_lesson=lesson.pk
+        )
+        self.assertFalse(timetable.conflicts(teacher.pk, self.date, 14 * 60, 30))
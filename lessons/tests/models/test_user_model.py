@@ -1,12 +1,12 @@
 from django.db import IntegrityError
-from django.test import TestCase
 from lessons.models import User
 from django.core.exceptions import ValidationError
+from lessons.tests.helpers import LessonsTestCase
 
 # Create your tests here.
 
 
-class UserModelTestCase(TestCase):
+class UserModelTestCase(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_user.json",
@@ -14,6 +14,7 @@ class UserModelTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.user = User.objects.get(email="default.user@example.org")
 
     def test_first_name_must_not_be_blank(self):
@@ -1,8 +1,9 @@
-from django.test import TestCase
 from django.urls import reverse
-from lessons.models import User, Student, Teacher, SchoolAdmin
+from djmoney.money import Money
+from lessons.models import Invoice, User, Student, Teacher, SchoolAdmin
+from lessons.tests.helpers import LessonsTestCase
 
-class AcccountViewTest(TestCase):
+class AcccountViewTest(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
@@ -11,7 +12,7 @@ class AcccountViewTest(TestCase):
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.user = User.objects.get(pk=2)
         self.student_user = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.student_user)
@@ -41,3 +42,32 @@ class AcccountViewTest(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "account_user.html")
+
+    def test_student_sees_outstanding_balance(self):
+        Invoice.objects.create(
+            user=self.student_user, invoice_num=1, price=Money(12, "GBP")
+        )
+        Invoice.objects.create(
+            user=self.student_user, invoice_num=2, price=Money(8, "GBP")
+        )
+        self.client.login(email=self.student_user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["balance"]["total"], Money(20, "GBP"))
+        self.assertContains(response, "across 2 unpaid invoices")
+
+    def test_director_sees_balances_per_school(self):
+        Invoice.objects.create(
+            user=self.student_user, invoice_num=1, price=Money(12, "GBP")
+        )
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.context["school_balances"],
+            [
+                {
+                    "school_name": self.student.school_name,
+                    "total": Money(12, "GBP"),
+                    "count": 1,
+                }
+            ],
+        )
@@ -0,0 +1,75 @@
+"""Tests of the admin list view"""
+from django.test import override_settings
+from django.urls import reverse
+
+from lessons.models import SchoolAdmin, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class AdminListViewTestCase(LessonsTestCase):
+    """Tests of the admin list view"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_user.json",
+        "lessons/tests/fixtures/default_director.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("admin_list")
+        self.user = User.objects.get(email="default.user@example.org")
+        self.director = User.objects.get(email="bob.dylan@example.org")
+
+    def _create_admins(self, count, is_active=True):
+        for i in range(count):
+            user = User.objects.create_user(
+                f"admin{SchoolAdmin.objects.count()}.{i}@example.org",
+                first_name="Admin",
+                last_name=f"Number{i}",
+                password="Password123",
+            )
+            user.is_active = is_active
+            user.is_school_admin = True
+            user.save()
+            SchoolAdmin.objects.create(user=user, school_name="King's College London")
+
+    def test_admin_list_url(self):
+        self.assertEqual(self.url, "/account/all_admins/")
+
+    def test_non_admins_are_forbidden(self):
+        self.client.login(email=self.user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_only_other_active_admins_are_listed(self):
+        self._create_admins(2)
+        self._create_admins(1, is_active=False)
+        self.client.login(email=self.director.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        admins = response.context["admins"]
+        self.assertEqual(len(admins), 2)
+        self.assertTrue(all(admin.user.is_active for admin in admins))
+        self.assertNotIn(self.director.id, [admin.user_id for admin in admins])
+        self.assertContains(response, "Edit")
+        self.assertContains(response, "Delete")
+
+    def test_query_count_does_not_grow_with_admins(self):
+        self._create_admins(2)
+        self.client.login(email=self.director.email, password="Watermelon123")
+        # session, user, admins with their users, current user's permissions
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        self._create_admins(8)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    @override_settings(ADMINS_PAGE_SIZE=3)
+    def test_admins_are_paged(self):
+        self._create_admins(5)
+        self.client.login(email=self.director.email, password="Watermelon123")
+        first_page = self.client.get(self.url)
+        self.assertEqual(len(first_page.context["admins"]), 3)
+        next_after = first_page.context["next_after"]
+        last_page = self.client.get(self.url, {"after": next_after})
+        self.assertEqual(len(last_page.context["admins"]), 2)
+        self.assertIsNone(last_page.context["next_after"])
@@ -1,11 +1,11 @@
-from django.test import TestCase
+from django.test import override_settings
 from django.urls import reverse
-from lessons.models import SchoolTerm, Booking, User, Student, Teacher
-from lessons.tests.helpers import create_test_bookings
-import datetime
+from djmoney.money import Money
+from lessons.models import Booking, Invoice, User, Student, Teacher
+from lessons.tests.helpers import LessonsTestCase, create_test_bookings, create_test_terms
 
 
-class BookingListTest(TestCase):
+class BookingListTest(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
@@ -13,7 +13,7 @@ class BookingListTest(TestCase):
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.url = reverse("bookings_list")
 
         self.user = User.objects.get(email="john.doe@example.org")
@@ -22,10 +22,7 @@ class BookingListTest(TestCase):
         self.user_teacher = User.objects.get(email="jane.doe@example.org")
         self.teacher = Teacher.objects.get(user=self.user_teacher)
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
 
     def test_booking_list_url(self):
         self.assertEqual(self.url, "/account/bookings/")
@@ -36,8 +33,7 @@ class BookingListTest(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "bookings_list.html")
-        for booking_id in range(10):
-            booking = Booking.objects.get(pk=booking_id + 1)
+        for booking in Booking.objects.all():
             self.assertContains(response, booking.num_of_lessons)
             self.assertContains(response, booking.description)
             self.assertContains(response, booking.invoice.urn)
@@ -54,3 +50,120 @@ class BookingListTest(TestCase):
             target_status_code=200,
             fetch_redirect_response=True,
         )
+
+    def test_booking_list_query_count_does_not_grow_with_bookings(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(3)
+        # session, user, the ETag state, bookings with their invoice, user
+        # and teacher
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        for _ in range(7):
+            booking = Booking.objects.first()
+            booking.pk = None
+            booking.save()
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_cached_booking_row_shows_saved_changes(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(1)
+        self.client.get(self.url)
+        booking = Booking.objects.get()
+        booking.description = "A brand new description"
+        # the cached row is only dropped once the change is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "A brand new description")
+
+    def test_cached_booking_row_is_kept_until_commit(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(1)
+        self.client.get(self.url)
+        booking = Booking.objects.get()
+        booking.description = "A brand new description"
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.save()
+        self.assertNotContains(self.client.get(self.url), "A brand new description")
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.client.get(self.url), "A brand new description")
+
+    def test_cached_booking_row_shows_invoice_changes(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(1)
+        self.client.get(self.url)
+        invoice = Booking.objects.get().invoice
+        invoice.price = Money(42, "GBP")
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "42.00")
+
+    def test_unchanged_booking_list_is_not_modified(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(2)
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        # session, user and the ETag state, nothing is rendered
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_changed_booking_list_is_sent_again(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(2)
+        etag = self.client.get(self.url)["ETag"]
+        invoice = Booking.objects.first().invoice
+        Invoice.objects.mark_paid(invoice.urn, invoice.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_booking_list_etag_depends_on_filters(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(2)
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(
+            self.url, {"unpaid": "on"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(BOOKINGS_PAGE_SIZE=4)
+    def test_booking_list_is_paged_by_id(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(10)
+        ids = list(Booking.objects.order_by("id").values_list("id", flat=True))
+        first_page = self.client.get(self.url)
+        self.assertEqual(
+            [booking.id for booking in first_page.context["bookings"]], ids[:4]
+        )
+        self.assertEqual(first_page.context["next_after"], ids[3])
+        self.assertContains(first_page, f"?after={ids[3]}")
+
+        last_page = self.client.get(self.url, {"after": ids[7]})
+        self.assertEqual(
+            [booking.id for booking in last_page.context["bookings"]], ids[8:]
+        )
+        self.assertIsNone(last_page.context["next_after"])
+        self.assertNotContains(last_page, "Next page")
+
+    def test_invalid_cursor_shows_the_first_page(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(2)
+        response = self.client.get(self.url, {"after": "abc"})
+        self.assertEqual(len(response.context["bookings"]), 2)
+
+    def test_booking_list_filters_keep_the_page_links(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        create_test_bookings(3)
+        with self.settings(BOOKINGS_PAGE_SIZE=1):
+            response = self.client.get(self.url, {"unpaid": "on"})
+        self.assertEqual(len(response.context["bookings"]), 1)
+        first_id = Booking.objects.order_by("id").first().id
+        self.assertContains(response, f"?unpaid=on&amp;after={first_id}")
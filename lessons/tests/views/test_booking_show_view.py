@@ -1,11 +1,10 @@
-from django.test import TestCase
 from django.urls import reverse
-from lessons.models import SchoolAdmin, SchoolTerm, Lesson, Booking, User, Student, Teacher
-from lessons.tests.helpers import create_test_bookings
+from lessons.models import SchoolAdmin, Lesson, Booking, User, Student, Teacher
+from lessons.tests.helpers import LessonsTestCase, create_test_bookings, create_test_terms
 import datetime
 
 
-class BookingShowTest(TestCase):
+class BookingShowTest(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_user.json",
@@ -15,7 +14,7 @@ class BookingShowTest(TestCase):
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.user = User.objects.get(pk=2)
 
         self.user_student = User.objects.get(email="john.doe@example.org")
@@ -27,10 +26,7 @@ class BookingShowTest(TestCase):
         self.user_director = User.objects.get(email="bob.dylan@example.org")
         self.director = SchoolAdmin.objects.get(user=self.user_director)
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
 
         #Creates 10 bookings for the above student user
         create_test_bookings(10)
@@ -52,11 +48,11 @@ class BookingShowTest(TestCase):
         )
 
     def test_show_booking_url(self):
-        self.assertEqual(self.url, "/account/bookings/1/")
+        self.assertEqual(self.url, f"/account/bookings/{self.booking_to_show.id}/")
 
     def test_show_booking_redirects_when_not_logged_in(self):
         response = self.client.get(self.url, follow=True)
-        redirect_url = "/log_in/?next=/account/bookings/1/"
+        redirect_url = f"/log_in/?next=/account/bookings/{self.booking_to_show.id}/"
         self.assertRedirects(
             response,
             redirect_url,
@@ -88,4 +84,37 @@ class BookingShowTest(TestCase):
             else:
                 self.assertContains(response, f'{lesson.startTime.hour} a.m.')
  
-   
\ No newline at end of file
+   
+
+    def test_show_booking_lists_lessons_by_date(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        lessons = list(self.booking_to_show.lesson_set.all())
+        # shuffle the dates so creation order and date order differ
+        for lesson, days in zip(lessons, [5, 1, 9, 3, 7, 2, 8, 4, 6, 0]):
+            lesson.date = datetime.date(2022, 9, 5) + datetime.timedelta(days=days)
+            lesson.save()
+        response = self.client.get(self.url)
+        dates = [lesson.date for lesson in response.context["lessons"]]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_show_booking_query_count_does_not_grow_with_lessons(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        # session, user, the ETag state, booking, lessons
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["lessons"]), 10)
+
+    def test_unchanged_booking_is_not_modified(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_booking_with_edited_lesson_is_sent_again(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        etag = self.client.get(self.url)["ETag"]
+        lesson = self.booking_to_show.lesson_set.first()
+        lesson.description = "Bring the sheet music"
+        lesson.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
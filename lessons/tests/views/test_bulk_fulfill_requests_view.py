@@ -0,0 +1,69 @@
+"""Tests of the Bulk Fulfill Requests view"""
+from django.urls import reverse
+
+from lessons.forms import BulkFulfillRequestsForm
+from lessons.models import Booking, RequestForLessons, SchoolAdmin, SchoolTerm, Student
+from lessons.tests.helpers import LessonsTestCase, create_test_terms
+
+
+class BulkFulfillRequestsViewTestCase(LessonsTestCase):
+    """Tests of the Bulk Fulfill Requests view"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_request.json",
+        "lessons/tests/fixtures/default_director.json",
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+        "lessons/tests/fixtures/default_user.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("bulk_fulfill_requests")
+        self.director = SchoolAdmin.objects.get(pk=6)
+        create_test_terms()
+
+    def test_bulk_fulfill_requests_url(self):
+        self.assertEqual(self.url, "/account/requests/fulfill/")
+
+    def test_GET_bulk_fulfill_requests_as_admin(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "bulk_fulfill_requests.html")
+        form = response.context["form"]
+        self.assertTrue(isinstance(form, BulkFulfillRequestsForm))
+        self.assertIn("teacher_1", form.fields)
+
+    def test_GET_with_propose_prefills_teachers(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(self.url, {"propose": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["form"].fields["teacher_1"].initial, 5)
+
+    def test_POST_fulfills_the_chosen_requests(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.post(self.url, {"teacher_1": 5}, follow=True)
+        self.assertTemplateUsed(response, "requests_list.html")
+        self.assertTrue(RequestForLessons.objects.get(pk=1).fulfilled)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_POST_without_teachers_fulfills_nothing(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        self.client.post(self.url, {"teacher_1": ""}, follow=True)
+        self.assertFalse(RequestForLessons.objects.get(pk=1).fulfilled)
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_failures_are_reported(self):
+        SchoolTerm.objects.all().delete()
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.post(self.url, {"teacher_1": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["failures"]), 1)
+        self.assertFalse(RequestForLessons.objects.get(pk=1).fulfilled)
+
+    def test_user_permission_denied_if_not_admin(self):
+        default_student = Student.objects.get(pk=1)
+        self.client.login(email=default_student.user.email, password="Watermelon123")
+        response = self.client.get(self.url, follow=True)
+        self.assertEqual(response.status_code, 403)
@@ -1,14 +1,13 @@
 """Tests of the create admin view"""
-from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.hashers import check_password
-from lessons.tests.helpers import LogInTester
+from lessons.tests.helpers import LessonsTestCase, LogInTester
 
 from lessons.forms import CreateAdminForm
 from lessons.models import SchoolAdmin, User
 
 
-class CreateAdminViewTestCase(TestCase, LogInTester):
+class CreateAdminViewTestCase(LessonsTestCase, LogInTester):
     """Tests of the create admin view"""
 
     fixtures = [
@@ -16,6 +15,7 @@ class CreateAdminViewTestCase(TestCase, LogInTester):
     ]
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("create_admin")
         self.director = SchoolAdmin.objects.get(user__email="bob.dylan@example.org")
         self.form_input = {
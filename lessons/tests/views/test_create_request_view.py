@@ -1,12 +1,12 @@
 """Tests of the Create Request for Lessons view"""
-from django.test import TestCase
 from django.urls import reverse
 from lessons.forms import RequestForLessonsForm
 
 from lessons.models import RequestForLessons, SchoolAdmin, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class CreateRequestForLessonsViewTestCase(TestCase):
+class CreateRequestForLessonsViewTestCase(LessonsTestCase):
     """Tests of the Create Request for Lessons view"""
 
     fixtures = [
@@ -15,6 +15,7 @@ class CreateRequestForLessonsViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("create_request")
         self.user = User.objects.get(email="default.user@example.org")
         self.form_input = {
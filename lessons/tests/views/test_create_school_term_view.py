@@ -1,12 +1,12 @@
 """Tests of the Create School Term view"""
-from django.test import TestCase
 from django.urls import reverse
 from lessons.forms import SchoolTermForm
 
 from lessons.models import SchoolAdmin, SchoolTerm, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class CreateSchoolTermViewTestCase(TestCase):
+class CreateSchoolTermViewTestCase(LessonsTestCase):
     """Tests of the Create School Term view"""
 
     fixtures = [
@@ -15,6 +15,7 @@ class CreateSchoolTermViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("create_school_term")
         # self.user = User.objects.get(email="default.user@example.org")
         self.director = SchoolAdmin.objects.get(user__email="bob.dylan@example.org")
@@ -1,12 +1,12 @@
 """Tests of the Edit Request for Lessons view"""
-from django.test import TestCase
 from django.urls import reverse
 from lessons.forms import RequestForLessonsForm
 
 from lessons.models import RequestForLessons, SchoolAdmin, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class EditRequestForLessonsViewTestCase(TestCase):
+class EditRequestForLessonsViewTestCase(LessonsTestCase):
     """Tests of the Edit Request for Lessons view"""
 
     fixtures = [
@@ -16,6 +16,7 @@ class EditRequestForLessonsViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.req = RequestForLessons.objects.get(pk=1)
         self.url = reverse("edit_request", kwargs={"id": self.req.pk})
         self.user = User.objects.get(email="default.user@example.org")
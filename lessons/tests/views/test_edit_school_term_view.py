@@ -1,13 +1,13 @@
 """Tests of the Edit School Term view"""
-from django.test import TestCase
 from django.urls import reverse
 import datetime
 from lessons.forms import RequestForLessonsForm, SchoolTermForm
 
 from lessons.models import RequestForLessons, SchoolAdmin, SchoolTerm, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class EditSchoolTermViewTestCase(TestCase):
+class EditSchoolTermViewTestCase(LessonsTestCase):
     """Tests of the Edit School Term view"""
 
     fixtures = [
@@ -16,6 +16,7 @@ class EditSchoolTermViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.term = SchoolTerm.objects.create(
             start_date=datetime.date(2022, 9, 1),
             end_date=datetime.date(2022, 10, 21),
@@ -48,9 +49,9 @@ class EditSchoolTermViewTestCase(TestCase):
     def test_unsuccsesful_edit_term(self):
         self.client.login(email=self.director.user.email, password="Watermelon123")
         self.form_input["start_date"] = "november"
-        before = SchoolTerm.objects.get(pk=1)
+        before = SchoolTerm.objects.get(pk=self.term.pk)
         response = self.client.post(self.url, self.form_input)
-        after = SchoolTerm.objects.get(pk=1)
+        after = SchoolTerm.objects.get(pk=self.term.pk)
         # an unsuccessful edit should not alter a field
         self.assertEqual(before.start_date, after.start_date)
         self.assertEqual(response.status_code, 200)
@@ -65,9 +66,9 @@ class EditSchoolTermViewTestCase(TestCase):
 
     def test_successful_edit_school_term(self):
         self.client.login(email=self.director.user.email, password="Watermelon123")
-        before = SchoolTerm.objects.get(pk=1)
+        before = SchoolTerm.objects.get(pk=self.term.pk)
         response = self.client.post(self.url, self.form_input, follow=True)
-        after = SchoolTerm.objects.get(pk=1)
+        after = SchoolTerm.objects.get(pk=self.term.pk)
         # a successful edit should alter a field
         self.assertNotEqual(before.start_date, after.start_date)
         response_url = reverse("school_terms_list")
@@ -75,10 +76,29 @@ class EditSchoolTermViewTestCase(TestCase):
             response, response_url, status_code=302, target_status_code=200
         )
         self.assertTemplateUsed(response, "school_terms_list.html")
-        trm = SchoolTerm.objects.get(pk=1)
+        trm = SchoolTerm.objects.get(pk=self.term.pk)
         self.assertEqual(trm.start_date.strftime("%Y/%m/%d"), "2022/10/09")
         self.assertEqual(trm.end_date.strftime("%Y/%m/%d"), "2022/12/09")
 
+    def test_edit_cannot_overlap_another_term(self):
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2022, 12, 1),
+            end_date=datetime.date(2022, 12, 20),
+        )
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.post(self.url, self.form_input)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "edit_school_term.html")
+        after = SchoolTerm.objects.get(pk=self.term.pk)
+        self.assertEqual(after.start_date, datetime.date(2022, 9, 1))
+
+    def test_edit_does_not_write_before_validating(self):
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        self.form_input["start_date"] = "november"
+        with self.assertNumQueries(4):
+            # session, user, school term, overlap check and no writes
+            self.client.post(self.url, self.form_input)
+
     def test_regular_users_cannot_edit_terms(self):
         user = User.objects.get(email="default.user@example.org")
         self.client.login(email=user.email, password="Watermelon123")
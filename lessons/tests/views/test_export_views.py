@@ -0,0 +1,114 @@
+"""Tests of the CSV export views"""
+import csv
+import io
+import datetime
+
+from django.test import override_settings
+from django.urls import reverse
+
+from lessons.models import Booking, Invoice, Lesson, SchoolTerm, User
+from lessons.tests.helpers import LessonsTestCase, create_test_bookings
+
+
+class ExportViewsTestCase(LessonsTestCase):
+    """Tests of the CSV export views"""
+
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_teacher.json",
+        "lessons/tests/fixtures/default_director.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.director = User.objects.get(email="bob.dylan@example.org")
+        self.student = User.objects.get(email="john.doe@example.org")
+        SchoolTerm.objects.create(
+            start_date=datetime.date(2022, 9, 1),
+            end_date=datetime.date(2022, 10, 21),
+        )
+        create_test_bookings(3)
+
+    def _download(self, url_name):
+        self.client.login(email=self.director.email, password="Watermelon123")
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(content, newline="")))
+
+    def test_export_urls(self):
+        self.assertEqual(reverse("export_bookings"), "/account/export/bookings/")
+        self.assertEqual(reverse("export_lessons"), "/account/export/lessons/")
+        self.assertEqual(reverse("export_invoices"), "/account/export/invoices/")
+
+    def test_export_bookings(self):
+        rows = self._download("export_bookings")
+        self.assertEqual(len(rows), Booking.objects.count())
+        booking = Booking.objects.order_by("pk").first()
+        self.assertEqual(rows[0]["booking_id"], str(booking.id))
+        self.assertEqual(rows[0]["student_email"], self.student.email)
+        self.assertEqual(rows[0]["teacher_email"], booking.teacher.user.email)
+        self.assertEqual(rows[0]["invoice_urn"], booking.invoice.urn)
+        self.assertEqual(rows[0]["is_paid"], "False")
+
+    def test_export_lessons(self):
+        rows = self._download("export_lessons")
+        self.assertEqual(len(rows), Lesson.objects.count())
+        lesson = Lesson.objects.order_by("pk").first()
+        self.assertEqual(rows[0]["lesson_id"], str(lesson.id))
+        self.assertEqual(rows[0]["date"], lesson.date.isoformat())
+        self.assertEqual(rows[0]["duration"], "60")
+        self.assertEqual(rows[0]["invoice_urn"], lesson.booking.invoice.urn)
+
+    def test_export_invoices(self):
+        rows = self._download("export_invoices")
+        self.assertEqual(
+            [row["invoice_urn"] for row in rows],
+            list(Invoice.objects.order_by("pk").values_list("urn", flat=True)),
+        )
+        self.assertEqual(rows[0]["student_last_name"], self.student.last_name)
+
+    def test_export_escapes_formulas(self):
+        self.student.first_name = '=HYPERLINK("http://example.org","x")'
+        self.student.last_name = "-Doe"
+        self.student.save()
+        Booking.objects.update(description="@SUM(1+1)")
+        rows = self._download("export_bookings")
+        self.assertEqual(
+            rows[0]["student_first_name"], '\'=HYPERLINK("http://example.org","x")'
+        )
+        self.assertEqual(rows[0]["student_last_name"], "'-Doe")
+        self.assertEqual(rows[0]["description"], "'@SUM(1+1)")
+        # numbers are left alone
+        self.assertFalse(rows[0]["price"].startswith("'"))
+
+    def test_export_escapes_tabs_and_carriage_returns(self):
+        for description in ("\t=1+1", "\r=1+1"):
+            Booking.objects.update(description=description)
+            rows = self._download("export_bookings")
+            self.assertEqual(rows[0]["description"], "'" + description)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_reads_lessons_in_chunks(self):
+        self.assertEqual(len(self._download("export_lessons")), 9)
+
+    def test_export_query_count_does_not_grow_with_rows(self):
+        self.client.login(email=self.director.email, password="Watermelon123")
+        response = self.client.get(reverse("export_lessons"))
+        # the rows are fetched with one query while the response is read
+        with self.assertNumQueries(1):
+            b"".join(response.streaming_content)
+
+    def test_students_cannot_export(self):
+        self.client.login(email=self.student.email, password="Watermelon123")
+        for url_name in ("export_bookings", "export_lessons", "export_invoices"):
+            response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 403)
+
+    def test_cannot_export_when_not_logged_in(self):
+        response = self.client.get(reverse("export_bookings"), follow=True)
+        self.assertRedirects(
+            response, "/log_in/?next=%2Faccount%2Fexport%2Fbookings%2F"
+        )
@@ -1,12 +1,12 @@
 """Tests of the Fulfill Request view"""
-from django.test import TestCase
 from django.urls import reverse
 from lessons.forms import FulfillLessonRequestForm
 
 from lessons.models import RequestForLessons, SchoolAdmin, Student, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class FulfillRequestViewTestCase(TestCase):
+class FulfillRequestViewTestCase(LessonsTestCase):
     """Tests of the Fulfill Request view"""
 
     fixtures = [
@@ -17,6 +17,7 @@ class FulfillRequestViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.req_pk = RequestForLessons.objects.get(pk=1).pk
         self.url = reverse("fulfill_request", kwargs={"id": self.req_pk})
         self.director = SchoolAdmin.objects.get(pk=6)
@@ -0,0 +1,73 @@
+from django.test import override_settings
+from django.urls import reverse
+from djmoney.money import Money
+from lessons.models import Invoice, User
+from lessons.tests.helpers import LessonsTestCase
+
+
+class InvoiceSearchViewTest(LessonsTestCase):
+
+    fixtures = [
+        "lessons/tests/fixtures/default_student.json",
+        "lessons/tests/fixtures/default_user.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("invoice_search")
+        self.user = User.objects.get(email="john.doe@example.org")
+        self.invoices = [
+            Invoice.objects.create(
+                user=self.user, invoice_num=num, price=Money(num, "GBP")
+            )
+            for num in range(1, 13)
+        ]
+
+    def _urns(self, response):
+        return [invoice["urn"] for invoice in response.json()["results"]]
+
+    def test_invoice_search_url(self):
+        self.assertEqual(self.url, "/account/payment/invoices/")
+
+    def test_invoice_search_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url, follow=True)
+        self.assertRedirects(
+            response,
+            "/log_in/?next=%2Faccount%2Fpayment%2Finvoices%2F",
+            status_code=302,
+            target_status_code=200,
+        )
+
+    def test_lists_unpaid_invoices_of_the_user(self):
+        Invoice.objects.filter(pk=self.invoices[0].pk).update(is_paid=True)
+        other_user = User.objects.get(pk=2)
+        Invoice.objects.create(user=other_user, invoice_num=1, price=Money(5, "GBP"))
+        self.client.login(email=self.user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self._urns(response), [invoice.urn for invoice in self.invoices[1:]]
+        )
+        self.assertEqual(response.json()["results"][0]["price"], "£2.00")
+
+    def test_filters_by_urn_prefix(self):
+        self.client.login(email=self.user.email, password="Watermelon123")
+        response = self.client.get(self.url, {"q": f"{self.user.id + 1000}-1"})
+        self.assertEqual(
+            self._urns(response),
+            [self.invoices[0].urn] + [invoice.urn for invoice in self.invoices[9:]],
+        )
+
+    @override_settings(INVOICE_SEARCH_PAGE_SIZE=5)
+    def test_results_are_paged(self):
+        self.client.login(email=self.user.email, password="Watermelon123")
+        first = self.client.get(self.url).json()
+        last = self.client.get(self.url, {"page": 3}).json()
+        self.assertEqual(len(first["results"]), 5)
+        self.assertTrue(first["has_next"])
+        self.assertEqual(len(last["results"]), 2)
+        self.assertFalse(last["has_next"])
+
+    def test_invalid_page_shows_the_first_page(self):
+        self.client.login(email=self.user.email, password="Watermelon123")
+        response = self.client.get(self.url, {"page": "abc"})
+        self.assertEqual(response.json()["page"], 1)
@@ -1,11 +1,9 @@
-from django.test import TestCase
 from django.urls import reverse
-from lessons.models import SchoolAdmin, SchoolTerm, Lesson, Booking, User, Student, Teacher
-from lessons.tests.helpers import create_test_bookings
-import datetime
+from lessons.models import SchoolAdmin, Lesson, Booking, User, Student, Teacher
+from lessons.tests.helpers import LessonsTestCase, create_test_bookings, create_test_terms
 
 
-class LessonEditTest(TestCase):
+class LessonEditTest(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
@@ -14,7 +12,7 @@ class LessonEditTest(TestCase):
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
 
         self.user = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user)
@@ -25,10 +23,7 @@ class LessonEditTest(TestCase):
         self.user_director = User.objects.get(email="bob.dylan@example.org")
         self.director = SchoolAdmin.objects.get(user=self.user_director)
 
-        SchoolTerm.objects.create(
-            start_date=datetime.date(2022, 9, 1),
-            end_date=datetime.date(2022, 10, 21),
-        )
+        create_test_terms()
         create_test_bookings(10)
         self.booking_to_edit = self.user.booking_set.first()
         self.lesson_to_edit = self.booking_to_edit.lesson_set.first()
@@ -43,7 +38,10 @@ class LessonEditTest(TestCase):
         }
 
     def test_lesson_edit_url(self):
-        self.assertEqual(self.url, "/account/bookings/1/10/")
+        self.assertEqual(
+            self.url,
+            f"/account/bookings/{self.booking_to_edit.id}/{self.lesson_to_edit.id}/",
+        )
 
     def test_lesson_edit_redirects_when_not_director(self):
         self.client.login(email=self.student.user.email, password="Watermelon123")
@@ -1,14 +1,14 @@
 """Unit tests of log in view"""
-from django.test import TestCase
 from django.urls import reverse
 from lessons.models import User, Student, SchoolAdmin
-from lessons.tests.helpers import LogInTester
+from lessons.tests.helpers import LessonsTestCase, LogInTester
 from lessons.forms import LogInForm
 
 # Create your tests here.
-class LogInTest(TestCase, LogInTester):
+class LogInTest(LessonsTestCase, LogInTester):
     """Unit tests of log in view"""
     def setUp(self):
+        super().setUp()
         self.url = reverse("log_in")
         self.user = User.objects.create_user(
             email="student@example.org",
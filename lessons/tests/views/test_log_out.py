@@ -1,12 +1,12 @@
-from django.test import TestCase
 from django.urls import reverse
 from lessons.models import User
-from lessons.tests.helpers import LogInTester
+from lessons.tests.helpers import LessonsTestCase, LogInTester
 
 
 # Create your tests here.
-class LogOutTest(TestCase, LogInTester):
+class LogOutTest(LessonsTestCase, LogInTester):
     def setUp(self):
+        super().setUp()
         self.sample_email = "sample@text.com"
         self.url = reverse("log_out")
         self.user = User.objects.create_user(
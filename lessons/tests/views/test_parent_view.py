@@ -1,10 +1,9 @@
-from django.test import TestCase
 from django.urls import reverse
 from lessons.models import User, Student
-from lessons.tests.helpers import LogInTester
+from lessons.tests.helpers import LessonsTestCase, LogInTester
 
 # Create your tests here.
-class LogInTest(TestCase, LogInTester):
+class LogInTest(LessonsTestCase, LogInTester):
     
     fixtures = [ 
                 "lessons/tests/fixtures/default_parent.json",
@@ -12,7 +11,7 @@ class LogInTest(TestCase, LogInTester):
                 ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.parent = User.objects.get(email="par@ent.org")
         self.child = User.objects.get(email="other.user@example.org")
         self.child_form_details = {
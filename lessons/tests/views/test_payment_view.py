@@ -1,11 +1,11 @@
-from django.test import TestCase
 from django.urls import reverse
 from lessons.models import Booking, Invoice, User, Student, Teacher
 import datetime
 from django.utils import timezone
+from lessons.tests.helpers import LessonsTestCase
 
 
-class PaymentFormTest(TestCase):
+class PaymentFormTest(LessonsTestCase):
 
     fixtures = [
         "lessons/tests/fixtures/default_student.json",
@@ -13,7 +13,7 @@ class PaymentFormTest(TestCase):
     ]
 
     def setUp(self):
-        super(TestCase, self).setUp()
+        super().setUp()
         self.url = reverse("payment_form")
         self.user = User.objects.get(email="john.doe@example.org")
         self.student = Student.objects.get(user=self.user)
@@ -63,7 +63,24 @@ class PaymentFormTest(TestCase):
         self.assertFalse(invoice_to_be_paid.is_paid)
         response = self.client.post(self.url, self.data, follow=True)
         invoice_to_be_paid = Invoice.objects.get(urn=self.booking.invoice.urn)
-     
+        self.assertTrue(invoice_to_be_paid.is_paid)
+        self.assertRedirects(response, reverse("account"))
+
+    def test_payment_is_a_single_update(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        self.client.get(self.url)
+        # session, user, invoice choice, conditional update
+        with self.assertNumQueries(4):
+            self.client.post(self.url, self.data)
+        self.assertTrue(Invoice.objects.get(urn=self.booking.invoice.urn).is_paid)
+
+    def test_repeated_payment_does_not_pay_again(self):
+        self.client.login(email=self.student.user.email, password="Watermelon123")
+        self.client.post(self.url, self.data)
+        response = self.client.post(self.url, self.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "payment_form.html")
+        self.assertTrue(Invoice.objects.get(urn=self.booking.invoice.urn).is_paid)
 
     def test_unsuccessful_new_payment(self):
         self.client.login(email=self.student.user.email, password="Watermelon123")
@@ -1,11 +1,13 @@
 """Tests of the Request for Lessons List view"""
-from django.test import TestCase
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from lessons.models import RequestForLessons, SchoolAdmin, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class RequestForLessonsListViewTestCase(TestCase):
+class RequestForLessonsListViewTestCase(LessonsTestCase):
     """Tests of the Request for Lessons List view"""
 
     fixtures = [
@@ -14,6 +16,7 @@ class RequestForLessonsListViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("requests_list")
         self.user = User.objects.get(email="default.user@example.org")
         self.director = SchoolAdmin.objects.get(user__email="bob.dylan@example.org")
@@ -27,7 +30,9 @@ class RequestForLessonsListViewTestCase(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "requests_list.html")
-        requests_list = response.context["requests"]
+        requests_list = list(response.context["unfulfilled_requests"]) + list(
+            response.context["fulfilled_requests"]
+        )
         # there should be a list of RequestForLessons objects in the context of the response
         self.assertTrue(isinstance(r, RequestForLessons) for r in requests_list)
         # if logged in as a user, only user's requests should be displayed
@@ -39,7 +44,9 @@ class RequestForLessonsListViewTestCase(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "requests_list.html")
-        requests_list = response.context["requests"]
+        requests_list = list(response.context["unfulfilled_requests"]) + list(
+            response.context["fulfilled_requests"]
+        )
         # there should be a list of RequestForLessons objects in the context of the response
         self.assertTrue(isinstance(r, RequestForLessons) for r in requests_list)
         # if logged in as an admin, all requests should be displayed
@@ -52,3 +59,73 @@ class RequestForLessonsListViewTestCase(TestCase):
             response, redirect_url, status_code=302, target_status_code=200
         )
         self.assertTemplateUsed(response, "log_in.html")
+
+    def _create_requests(self, count, fulfilled):
+        for _ in range(count):
+            RequestForLessons.objects.create(
+                user=self.user, availability="MON", fulfilled=fulfilled
+            )
+
+    def test_requests_are_split_by_fulfilled(self):
+        self._create_requests(3, False)
+        self._create_requests(2, True)
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(self.url)
+        unfulfilled = response.context["unfulfilled_requests"]
+        fulfilled = response.context["fulfilled_requests"]
+        self.assertEqual(len(unfulfilled), 3)
+        self.assertEqual(len(fulfilled), 2)
+        self.assertTrue(all(not r.fulfilled for r in unfulfilled))
+        self.assertTrue(all(r.fulfilled for r in fulfilled))
+
+    @override_settings(REQUESTS_PAGE_SIZE=2)
+    def test_each_list_is_paged_on_its_own(self):
+        self._create_requests(5, False)
+        self._create_requests(3, True)
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(
+            self.url, {"unfulfilled_page": 3, "fulfilled_page": 2}
+        )
+        self.assertEqual(len(response.context["unfulfilled_requests"]), 1)
+        self.assertEqual(len(response.context["fulfilled_requests"]), 1)
+        self.assertContains(response, "Page 3 of 3")
+        self.assertContains(response, "Page 2 of 2")
+
+    def test_admin_query_count_does_not_grow_with_requests(self):
+        self._create_requests(2, False)
+        self._create_requests(1, True)
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        # session, user, the ETag state, and a count and a page with the
+        # users joined per list
+        with self.assertNumQueries(7):
+            self.client.get(self.url)
+        self._create_requests(6, False)
+        self._create_requests(4, True)
+        with self.assertNumQueries(7):
+            self.client.get(self.url)
+
+    def test_unchanged_request_list_is_not_modified(self):
+        self._create_requests(2, False)
+        self.client.login(email=self.user.email, password="Watermelon123")
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_request_list_is_sent_again_after_fulfilling(self):
+        self._create_requests(2, False)
+        self.client.login(email=self.user.email, password="Watermelon123")
+        etag = self.client.get(self.url)["ETag"]
+        # update() sets updated_at itself
+        request = RequestForLessons.objects.filter(user=self.user).first()
+        RequestForLessons.objects.filter(pk=request.pk).update(
+            fulfilled=True, updated_at=timezone.now()
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_list_etag_differs_between_users(self):
+        self.client.login(email=self.user.email, password="Watermelon123")
+        etag = self.client.get(self.url)["ETag"]
+        self.client.login(email=self.director.user.email, password="Watermelon123")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -1,11 +1,11 @@
 """Tests of the School Terms List view"""
-from django.test import TestCase
 from django.urls import reverse
 
 from lessons.models import SchoolAdmin, SchoolTerm, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class SchoolTermsListView(TestCase):
+class SchoolTermsListView(LessonsTestCase):
     """Tests of the School Terms List view"""
 
     fixtures = [
@@ -14,6 +14,7 @@ class SchoolTermsListView(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("school_terms_list")
         self.director = SchoolAdmin.objects.get(user__email="bob.dylan@example.org")
 
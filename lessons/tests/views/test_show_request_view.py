@@ -1,11 +1,11 @@
 """Tests of the Show Request view"""
-from django.test import TestCase
 from django.urls import reverse
 
 from lessons.models import RequestForLessons, User
+from lessons.tests.helpers import LessonsTestCase
 
 
-class ShowRequestForLessonsViewTestCase(TestCase):
+class ShowRequestForLessonsViewTestCase(LessonsTestCase):
     """Tests of the Show Request view"""
 
     fixtures = [
@@ -14,6 +14,7 @@ class ShowRequestForLessonsViewTestCase(TestCase):
     ]
 
     def setUp(self):
+        super().setUp()
         self.req = RequestForLessons.objects.get(pk=1)
         self.url = reverse("show_request", kwargs={"id": self.req.pk})
         self.user = User.objects.get(email="default.user@example.org")
@@ -1,17 +1,17 @@
 """Tests of the sign up view"""
-from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.hashers import check_password
-from lessons.tests.helpers import LogInTester
+from lessons.tests.helpers import LessonsTestCase, LogInTester
 
 from lessons.forms import StudentSignUpForm
 from lessons.models import Student, User
 
 
-class StudentSignUpViewTestCase(TestCase, LogInTester):
+class StudentSignUpViewTestCase(LessonsTestCase, LogInTester):
     """Tests of the sign up view"""
 
     def setUp(self):
+        super().setUp()
         self.url = reverse("sign_up_student")
         self.form_input = {
             "first_name": "John",
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib.admin.options import PermissionDenied
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls.exceptions import Http404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from djmoney.money import Money
 from .models import (
     Booking,
     Invoice,
@@ -12,7 +19,14 @@ from .models import (
     SchoolAdmin,
     User,
     Lesson,
+    Teacher,
 )
+from .balances import outstanding_balance, school_balances
+from .conditional import page_etag, per_request
+from .exports import BOOKING_COLUMNS, INVOICE_COLUMNS, LESSON_COLUMNS, csv_rows
+from .fulfillment import fulfill_requests, propose_assignments
+from .pagination import keyset_page
+from .row_cache import row_versions, set_row_versions
 from .forms import (
     EditAdminForm,
     RequestForLessonsForm,
@@ -28,6 +42,8 @@ from .forms import (
     EditBookingForm,
     EditLessonForm,
     CreateAdminForm,
+    BulkFulfillRequestsForm,
+    BookingFilterForm,
 )
 
 
@@ -130,17 +146,32 @@ def account(request):
     # redirect school admins to their dashboard template
     if request.user.is_school_admin and request.user.is_active:
         return render(
-            request, "account_admin.html", {"school_admin": request.user.schooladmin}
+            request,
+            "account_admin.html",
+            {
+                "school_admin": request.user.schooladmin,
+                "school_balances": school_balances(),
+            },
         )
     # reditect parents to their dashboard template
     elif request.user.is_parent and request.user.is_active:
         return render(
-            request, "account_parent.html", {"student": request.user.student}
+            request,
+            "account_parent.html",
+            {
+                "student": request.user.student,
+                "balance": outstanding_balance(request.user),
+            },
         )
     # redirect students to student template
     elif request.user.is_student:
         return render(
-            request, "account_student.html", {"student": request.user.student}
+            request,
+            "account_student.html",
+            {
+                "student": request.user.student,
+                "balance": outstanding_balance(request.user),
+            },
         )
     # redirect sys admins to Django admin page
     elif request.user.is_admin:
@@ -154,33 +185,136 @@ def account(request):
         )
 
 
-@login_required
-def bookings_list(request):
+@per_request
+def _filtered_bookings(request):
     if request.user.is_school_admin is True:
-        try:
-            bookings = Booking.objects.all()
-        except ObjectDoesNotExist:
-            return redirect("bookings_list")
+        bookings = Booking.objects.all()
     else:
         bookings = request.user.booking_set.all()
+
+    filter_form = BookingFilterForm(request.GET, user=request.user)
+    if filter_form.is_valid():
+        bookings = filter_form.filter(bookings)
+    return filter_form, bookings
+
+
+@per_request
+def _bookings_list_state(request):
+    # a row shows the booking and its invoice, so a change to either counts
+    _, bookings = _filtered_bookings(request)
+    state = bookings.aggregate(
+        count=Count("id"),
+        booking_modified=Max("updated_at"),
+        invoice_modified=Max("invoice__updated_at"),
+    )
+    modified = [
+        date
+        for date in (state["booking_modified"], state["invoice_modified"])
+        if date is not None
+    ]
+    return state["count"], max(modified, default=None)
+
+
+def _bookings_list_etag(request):
+    return page_etag(request, *_bookings_list_state(request))
+
+
+def _bookings_list_last_modified(request):
+    return _bookings_list_state(request)[1]
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=_bookings_list_etag, last_modified_func=_bookings_list_last_modified
+)
+def bookings_list(request):
+    filter_form, bookings = _filtered_bookings(request)
+    bookings, next_after = keyset_page(
+        bookings.select_related("invoice", "user", "teacher__user"),
+        request.GET.get("after"),
+        settings.BOOKINGS_PAGE_SIZE,
+    )
+
+    # a booking row shows its invoice too, so it is cached under both versions
+    set_row_versions(bookings, "booking")
+    invoice_versions = row_versions(
+        "invoice", [booking.invoice.urn for booking in bookings]
+    )
+    for booking in bookings:
+        booking.row_version += "." + invoice_versions[booking.invoice.urn]
+
+    # the page links keep the filters
+    query = request.GET.copy()
+    query.pop("after", None)
     return render(
-        request, "bookings_list.html", {"bookings": bookings, "user": request.user}
+        request,
+        "bookings_list.html",
+        {
+            "bookings": bookings,
+            "user": request.user,
+            "filter_form": filter_form,
+            "filter_query": query.urlencode(),
+            "next_after": next_after,
+            "is_first_page": "after" not in request.GET,
+            "row_cache_timeout": settings.ROW_CACHE_TIMEOUT,
+        },
     )
 
 
+@per_request
+def _show_booking_state(request, booking_id):
+    return (
+        Booking.objects.filter(id=booking_id)
+        .annotate(
+            lesson_count=Count("lesson"), lessons_modified=Max("lesson__updated_at")
+        )
+        .values_list("updated_at", "lesson_count", "lessons_modified")
+        .first()
+    )
+
+
+def _show_booking_etag(request, booking_id):
+    state = _show_booking_state(request, booking_id)
+    if state is None:
+        # no such booking, the view redirects
+        return None
+    return page_etag(request, *state)
+
+
+def _show_booking_last_modified(request, booking_id):
+    state = _show_booking_state(request, booking_id)
+    if state is None:
+        return None
+    updated_at, _, lessons_modified = state
+    return max(updated_at, lessons_modified or updated_at)
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=_show_booking_etag, last_modified_func=_show_booking_last_modified
+)
 def show_booking(request, booking_id):
     try:
         booking = Booking.objects.get(id=booking_id)
-        lessons = booking.lesson_set.all()
-        if request.user.is_school_admin is False and booking.user != request.user and not request.user.parents:
+        # served by the (booking, date, startTime) index on lessons
+        lessons = booking.lesson_set.order_by("date", "startTime")
+        if request.user.is_school_admin is False and booking.user_id != request.user.id and not request.user.parents:
             # Users can only their bookings
             return redirect("account")
     except ObjectDoesNotExist:
         return redirect("bookings_list")
     else:
         return render(
-            request, "show_booking.html", {"lessons": lessons, "user": request.user}
+            request,
+            "show_booking.html",
+            {
+                "booking": booking,
+                "lessons": set_row_versions(list(lessons), "lesson"),
+                "user": request.user,
+                "row_cache_timeout": settings.ROW_CACHE_TIMEOUT,
+            },
         )
 
 
@@ -196,12 +330,12 @@ def edit_lesson(request, booking_id, lesson_id):
             if form.is_valid():
                 lesson = form.save()
                 return redirect("show_booking", booking_id=booking.id)
-            else:
-                form = EditLessonForm(lesson=lesson)
+        else:
+            form = EditLessonForm(lesson=lesson)
     except ObjectDoesNotExist:
         return redirect("show_booking", booking_id=booking.id)
     else:
-        form = EditLessonForm(lesson=lesson)
+        # an invalid form is shown again with its errors
         return render(
             request,
             "edit_lesson.html",
@@ -232,7 +366,14 @@ def edit_booking(request, booking_id):
         if request.method == "POST":
             form = EditBookingForm(request.POST, booking=booking)
             if form.is_valid():
-                booking = form.save()
+                try:
+                    booking = form.save()
+                except ValidationError as error:
+                    # the new schedule clashes with the teacher's other lessons
+                    form.add_error(None, error)
+                    return render(
+                        request, "edit_booking.html", {"booking": booking, "form": form}
+                    )
                 return redirect("bookings_list")
             else:
                 form = EditBookingForm(booking=booking)
@@ -243,14 +384,54 @@ def edit_booking(request, booking_id):
         return render(request, "edit_booking.html", {"booking": booking, "form": form})
 
 
-@login_required
-def requests_list(request):
+def _visible_requests(request):
     if request.user.is_school_admin:
-        requests = RequestForLessons.objects.all()
-    else:
-        requests = request.user.requestforlessons_set.all()
+        return RequestForLessons.objects.all()
+    return request.user.requestforlessons_set.all()
+
+
+@per_request
+def _requests_list_state(request):
+    state = _visible_requests(request).aggregate(
+        count=Count("id"), modified=Max("updated_at")
+    )
+    return state["count"], state["modified"]
+
 
-    return render(request, "requests_list.html", {"requests": requests})
+def _requests_list_etag(request):
+    return page_etag(request, *_requests_list_state(request))
+
+
+def _requests_list_last_modified(request):
+    return _requests_list_state(request)[1]
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=_requests_list_etag, last_modified_func=_requests_list_last_modified
+)
+def requests_list(request):
+    requests = _visible_requests(request).select_related("user")
+
+    # each list is paged on its own, both are served by the index on
+    # (fulfilled, request_created_at)
+    page_size = settings.REQUESTS_PAGE_SIZE
+    unfulfilled_requests = Paginator(
+        requests.filter(fulfilled=False), page_size
+    ).get_page(request.GET.get("unfulfilled_page"))
+    fulfilled_requests = Paginator(
+        requests.filter(fulfilled=True), page_size
+    ).get_page(request.GET.get("fulfilled_page"))
+    return render(
+        request,
+        "requests_list.html",
+        {
+            "unfulfilled_requests": set_row_versions(unfulfilled_requests, "request"),
+            "fulfilled_requests": set_row_versions(fulfilled_requests, "request"),
+            "row_cache_timeout": settings.ROW_CACHE_TIMEOUT,
+        },
+    )
 
 
 @login_required
@@ -282,9 +463,14 @@ def fulfill_request(request, id):
     if request.method == "POST":
         form = FulfillLessonRequestForm(request.POST, lesson_request=lesson_request)
         if form.is_valid():
-            booking = form.save()
-            print(booking)
-            return redirect("requests_list")
+            try:
+                booking = form.save()
+            except ValidationError as error:
+                # no school terms, or the teacher has no free time left
+                form.add_error(None, error)
+            else:
+                print(booking)
+                return redirect("requests_list")
     else:
         form = FulfillLessonRequestForm(lesson_request=lesson_request)
 
@@ -297,6 +483,50 @@ def fulfill_request(request, id):
     )
 
 
+@login_required
+def bulk_fulfill_requests(request):
+    if not request.user.is_school_admin:
+        raise PermissionDenied
+
+    unfulfilled_requests = RequestForLessons.objects.filter(
+        fulfilled=False
+    ).select_related("user").order_by("request_created_at")
+    teachers = list(Teacher.objects.select_related("user"))
+    failures = []
+
+    if request.method == "POST":
+        form = BulkFulfillRequestsForm(
+            request.POST,
+            lesson_requests=list(unfulfilled_requests),
+            teachers=teachers,
+        )
+        if form.is_valid():
+            bookings, failed = fulfill_requests(form.assignments())
+            if not failed:
+                return redirect("requests_list")
+            failures = sorted(failed.items())
+            # show the requests that are still left to fulfill
+            form = BulkFulfillRequestsForm(
+                lesson_requests=list(unfulfilled_requests.all()),
+                teachers=teachers,
+            )
+    else:
+        lesson_requests = list(unfulfilled_requests)
+        proposal = {}
+        if "propose" in request.GET:
+            # prefill the form with a balanced assignment of teachers
+            proposal = propose_assignments(lesson_requests, teachers)
+        form = BulkFulfillRequestsForm(
+            lesson_requests=lesson_requests, teachers=teachers, proposal=proposal
+        )
+
+    return render(
+        request,
+        "bulk_fulfill_requests.html",
+        {"form": form, "failures": failures},
+    )
+
+
 def extract_email(string):
     email = ""
     i = len(string) - 1
@@ -364,9 +594,25 @@ def edit_request(request, id):
 def admin_list(request):
     if not request.user.is_school_admin:
         raise PermissionDenied
-    admins = SchoolAdmin.objects.all().exclude(user=request.user)
+    admins, next_after = keyset_page(
+        SchoolAdmin.objects.filter(user__is_active=True)
+        .exclude(user=request.user)
+        .select_related("user"),
+        request.GET.get("after"),
+        settings.ADMINS_PAGE_SIZE,
+    )
+    school_admin = request.user.schooladmin
     return render(
-        request, "admin_list.html", {"admins": admins, "current_user": request.user}
+        request,
+        "admin_list.html",
+        {
+            "admins": admins,
+            "current_user": request.user,
+            "can_edit_admins": school_admin.can_edit_admins,
+            "can_delete_admins": school_admin.can_delete_admins,
+            "next_after": next_after,
+            "is_first_page": "after" not in request.GET,
+        },
     )
 
 @login_required
@@ -432,18 +678,48 @@ def payment(request):
     if request.method == "POST":
         form = PaymentForm(request.POST, user=request.user)
         if form.is_valid():
-            try:
-                invoice = Invoice.objects.get(urn=form.cleaned_data.get("invoice_urn"))
-                invoice.is_paid = True
-                invoice.save()
-                return redirect("account")
-            except ObjectDoesNotExist:
-                form = PaymentForm(user=request.user)
+            # a repeated submission finds the invoice already paid and does nothing
+            Invoice.objects.mark_paid(
+                form.cleaned_data.get("invoice_urn"), request.user
+            )
+            return redirect("account")
     else:
         form = PaymentForm(user=request.user)
     return render(request, "payment_form.html", {"form": form})
 
 
+@login_required
+def invoice_search(request):
+    """Returns a page of the user's unpaid invoices whose reference number
+    starts with ?q= as JSON, for suggesting invoices on the payment form"""
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    page_size = settings.INVOICE_SEARCH_PAGE_SIZE
+    offset = (page - 1) * page_size
+
+    invoices = Invoice.objects.filter(
+        user=request.user,
+        is_paid=False,
+        urn__startswith=request.GET.get("q", "").strip(),
+    ).order_by("invoice_num")
+    # fetching one extra row tells us if there is a next page without a COUNT
+    rows = list(
+        invoices.values_list("urn", "price")[offset : offset + page_size + 1]
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {"urn": urn, "price": str(Money(price, "GBP"))}
+                for urn, price in rows[:page_size]
+            ],
+            "page": page,
+            "has_next": len(rows) > page_size,
+        }
+    )
+
+
 @login_required
 def register_child(request):
     if request.user.is_parent:
@@ -511,13 +787,52 @@ def select_child(request):
     else: 
         return redirect('account')
 
+def _csv_export(queryset, columns, filename):
+    response = StreamingHttpResponse(
+        csv_rows(queryset, columns), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def export_bookings(request):
+    if not request.user.is_school_admin:
+        raise PermissionDenied
+
+    return _csv_export(Booking.objects.all(), BOOKING_COLUMNS, "bookings.csv")
+
+
+@login_required
+def export_lessons(request):
+    if not request.user.is_school_admin:
+        raise PermissionDenied
+
+    return _csv_export(Lesson.objects.all(), LESSON_COLUMNS, "lessons.csv")
+
+
+@login_required
+def export_invoices(request):
+    if not request.user.is_school_admin:
+        raise PermissionDenied
+
+    return _csv_export(Invoice.objects.all(), INVOICE_COLUMNS, "invoices.csv")
+
+
 @login_required
 def school_terms_list(request):
     if not request.user.is_school_admin:
         raise PermissionDenied
 
-    school_terms = SchoolTerm.objects.all()
-    return render(request, "school_terms_list.html", {"school_terms": school_terms})
+    school_terms = set_row_versions(list(SchoolTerm.objects.all()), "schoolterm")
+    return render(
+        request,
+        "school_terms_list.html",
+        {
+            "school_terms": school_terms,
+            "row_cache_timeout": settings.ROW_CACHE_TIMEOUT,
+        },
+    )
 
 
 @login_required
@@ -560,17 +875,9 @@ def edit_school_term(request, id):
 
     if request.method == "POST":
         form = SchoolTermForm(request.POST, instance=term)
-
-        # form.is_valid() will call term.clean()
-        # the term needs to be hidden right before being cleaned
-        # so as not to check overlapping against itself
-        term._editing = True
-        term.save()
+        # form.is_valid() will call term.clean(), which does not
+        # check the term for overlapping with itself
         if form.is_valid():
-            # finished editing
-            term._editing = False
-            term.save()
-
             term = form.save(edit=True)
             term.save()
             return redirect("school_terms_list")
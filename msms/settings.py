@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -77,12 +79,84 @@ WSGI_APPLICATION = "msms.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# The database is picked from the environment. DATABASE_ENGINE is "sqlite"
+# (the default, for development) or "postgresql", which runs with several
+# worker processes without SQLite's single writer lock.
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite")
+
+if DATABASE_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DATABASE_NAME", BASE_DIR / "db.sqlite3"),
+        }
+    }
+elif DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DATABASE_NAME", "msms"),
+            "USER": os.environ.get("DATABASE_USER", ""),
+            "PASSWORD": os.environ.get("DATABASE_PASSWORD", ""),
+            "HOST": os.environ.get("DATABASE_HOST", ""),
+            "PORT": os.environ.get("DATABASE_PORT", ""),
+            # keep connections open between requests, checking them before
+            # reuse so one dropped by the server is replaced
+            "CONN_MAX_AGE": int(os.environ.get("DATABASE_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"DATABASE_ENGINE must be sqlite or postgresql, not {DATABASE_ENGINE!r}"
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# Balances and rendered list rows are cached, and dropped when they change.
+# Every worker process has to see the same cache for that to work, so only
+# use "locmem" with a single process. CACHE_BACKEND is "locmem", "redis",
+# "memcached" or "database" (run createcachetable first), and defaults to
+# the database when running on PostgreSQL.
+CACHE_BACKEND = os.environ.get(
+    "CACHE_BACKEND", "database" if DATABASE_ENGINE == "postgresql" else "locmem"
+)
+CACHE_LOCATION = os.environ.get("CACHE_LOCATION")
+
+if CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+elif CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_LOCATION or "redis://127.0.0.1:6379",
+        }
     }
-}
+elif CACHE_BACKEND == "memcached":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": CACHE_LOCATION or "127.0.0.1:11211",
+        }
+    }
+elif CACHE_BACKEND == "database":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": CACHE_LOCATION or "msms_cache",
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND must be locmem, redis, memcached or database, "
+        f"not {CACHE_BACKEND!r}"
+    )
 
 
 # Password validation
@@ -133,3 +207,36 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Student model
 AUTH_USER_MODEL = "lessons.User"
+
+# Number of lessons written per INSERT when a booking's lessons are generated
+LESSON_BULK_CREATE_BATCH_SIZE = 500
+
+# Seconds a process keeps its cached copy of the school terms
+SCHOOL_TERM_CACHE_TIMEOUT = 300
+
+# Seconds an outstanding balance stays cached, invoice changes drop it sooner
+# (see lessons.balances)
+BALANCE_CACHE_TIMEOUT = 60
+
+# Price of a minute of lessons in pounds, run the reprice_invoices command
+# after changing it to update the unpaid invoices
+LESSON_TARIFF_PER_MINUTE = "0.10"
+
+# Number of unpaid invoices the payment form suggests at a time
+INVOICE_SEARCH_PAGE_SIZE = 20
+
+# Number of bookings shown per page of the bookings list
+BOOKINGS_PAGE_SIZE = 25
+
+# Number of requests shown per page of each list on the requests page
+REQUESTS_PAGE_SIZE = 25
+
+# Number of admins shown per page of the admin list
+ADMINS_PAGE_SIZE = 25
+
+# Seconds a rendered row of a list stays cached, changing the row drops it
+# straight away (see lessons.row_cache)
+ROW_CACHE_TIMEOUT = 600
+
+# Number of rows fetched from the database at a time by the CSV exports
+EXPORT_CHUNK_SIZE = 2000
@@ -73,6 +73,11 @@ urlpatterns = [
         views.create_request,
         name="create_request"
     ),  # path to create new request
+    path(
+        "account/requests/fulfill/",
+        views.bulk_fulfill_requests,
+        name="bulk_fulfill_requests",
+    ),  # path to fulfill many requests at once
     path(
         "account/requests/<int:id>/",
         views.show_request,
@@ -100,6 +105,11 @@ urlpatterns = [
         views.payment,
         name="payment_form"
     ),  # path to payment page
+    path(
+        "account/payment/invoices/",
+        views.invoice_search,
+        name="invoice_search"
+    ),  # path to search unpaid invoices as JSON
 
     # ---------- ADMIN SECTION ----------
     path(
@@ -123,6 +133,22 @@ urlpatterns = [
         name="delete_school_term",
     ),
 
+    path(
+        "account/export/bookings/",
+        views.export_bookings,
+        name="export_bookings",
+    ),  # path to download every booking as CSV
+    path(
+        "account/export/lessons/",
+        views.export_lessons,
+        name="export_lessons",
+    ),  # path to download every lesson as CSV
+    path(
+        "account/export/invoices/",
+        views.export_invoices,
+        name="export_invoices",
+    ),  # path to download every invoice as CSV
+
     path(
         "account/all_admins/",
         views.admin_list,